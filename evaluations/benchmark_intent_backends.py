@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from transformers import pipeline
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from modules.module2.model_registry import INTENT_MODEL_DIR
+from modules.module2.intent_onnx import load_onnx_intent_classifier
+
+# -------------------------------
+# Latency helpers
+# -------------------------------
+def per_query_latencies(classifier, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        classifier(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def batched_throughput(classifier, queries, batch_size=32):
+    start = time.perf_counter()
+    classifier(queries, batch_size=batch_size, truncation=True)
+    return len(queries) / (time.perf_counter() - start)
+
+def summarize(latencies):
+    return {
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3)
+    }
+
+# -------------------------------
+# Benchmark Runner
+# -------------------------------
+def benchmark(max_queries=200, warmup=10):
+    queries = pd.read_csv("./modules/data/intent_test_final.csv")["text"].astype(str).tolist()[:max_queries]
+    print(f"\n🚀 Benchmarking intent backends on CPU over {len(queries)} queries...\n")
+
+    backends = {
+        "torch": pipeline("text-classification", model=INTENT_MODEL_DIR, tokenizer=INTENT_MODEL_DIR, device="cpu"),
+        "onnx": load_onnx_intent_classifier()
+    }
+
+    report = {"num_queries": len(queries)}
+    labels = {}
+    for name, classifier in backends.items():
+        for query in queries[:warmup]:
+            classifier(query)
+        latencies = per_query_latencies(classifier, queries)
+        report[name] = summarize(latencies)
+        report[name]["batched_qps"] = round(batched_throughput(classifier, queries), 2)
+        labels[name] = [r["label"] for r in classifier(queries, batch_size=32, truncation=True)]
+        print(f"  {name:5s} — {report[name]}")
+
+    report["speedup_p50"] = round(report["torch"]["p50_ms"] / report["onnx"]["p50_ms"], 2)
+    report["label_agreement"] = round(float(np.mean([a == b for a, b in zip(labels["torch"], labels["onnx"])])), 4)
+
+    os.makedirs("./evaluations/results", exist_ok=True)
+    output_path = "./evaluations/results/intent_backend_benchmark.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n✅ ONNX p50 speedup: {report['speedup_p50']}x | Label agreement: {report['label_agreement']}")
+    print(f"📁 Results saved to: {output_path}")
+    return report
+
+# -------------------------------
+# Entry Point
+# -------------------------------
+if __name__ == "__main__":
+    benchmark()
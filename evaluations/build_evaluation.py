@@ -1,12 +1,15 @@
 import os
+import sys
 import json
+import argparse
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 import torch
 from sentence_transformers import CrossEncoder
 
 # Automatically use GPU if available
-device = "cuda" if torch.cuda.is_available() else "mps"
+device = "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
 print(f"Using device: {device}")
 
 # Load cross-encoder model
@@ -140,39 +143,156 @@ def score_to_relevance(score):
     else:
         return 0
 
-# Build the relevance-labeled test collection
-test_collection = []
-
-for query, intent in tqdm(query_intent_map.items(), desc="Processing queries"):
-    df1, text_field = intent_sources[intent]
-    # Pair each document with the query
-    # texts = df[text_field].fillna("").astype(str).tolist()
-    # pairs = [(query, text) for text in texts]
-    pairs = []
-    for _, row in df1.iterrows():
-        combined_text = " ".join(str(value) for value in row if pd.notna(value))
-        pairs.append((query, combined_text))
-        
-
-    scores = model.predict(pairs)
-    relevance_dict = {}
-    for i, score in enumerate(scores):
-        rel = score_to_relevance(score)
-        if rel > 0:
-            doc_id = str(df1.iloc[i].get("doc_id", f"doc_{intent}_{i}"))
-            relevance_dict[doc_id] = rel
-
-    test_collection.append({
-        "query": query,
-        "relevant_docs": relevance_dict
-    })
-
-# Save result
-output_dir = "evaluations/results"
-os.makedirs(output_dir, exist_ok=True)
-output_file = os.path.join(output_dir, "crossencoder_ndcg_test_collection.json")
-
-with open(output_file, "w") as f:
-    json.dump(test_collection, f, indent=2)
-
-print(f"\nTest collection saved to: {output_file}")
+# Each source's document texts and doc_ids, built once instead of per query
+def source_documents(intent):
+    df1, _ = intent_sources[intent]
+    texts = [" ".join(str(value) for value in row if pd.notna(value)) for row in df1.itertuples(index=False)]
+    if "doc_id" in df1.columns:
+        doc_ids = [str(doc_id) for doc_id in df1["doc_id"]]
+    else:
+        doc_ids = [f"doc_{intent}_{i}" for i in range(len(df1))]
+    return texts, doc_ids
+
+# Content hash of each row's indexed text, to match research_index entries back to rows
+def source_hashes(intent):
+    from modules.module2.roberta_index import content_hash, document_text
+    df1, _ = intent_sources[intent]
+    return [content_hash(document_text(row)) for row in df1.to_dict("records")]
+
+# Optional dense prefilter: only the top prefilter_k documents per query are
+# cross-encoded; the rest count as not relevant. Candidates come from the
+# float16 research_index export (vector_store.py --npy): the intent's rows are
+# sliced out of the memmap once and all queries are scored in one matmul, so
+# only the queries are encoded, never the corpus
+def dense_candidates(queries, intent, row_hashes, prefilter_k, encoder, matrix, rows):
+    from modules.module2.vector_store import brute_force_search
+
+    rows_by_hash = {}
+    for i, row_hash in enumerate(row_hashes):
+        rows_by_hash.setdefault(row_hash, []).append(i)
+    source_rows = np.flatnonzero(rows["source"] == intent)
+    matched = np.array([h in rows_by_hash for h in rows["content_hash"][source_rows]], dtype=bool)
+    if not matched.all():
+        print(f"⚠️ {(~matched).sum()} {intent} embeddings matched no CSV row; the export may be out of date")
+    source_rows = source_rows[matched]
+    if not len(source_rows):
+        return [np.arange(0)] * len(queries)
+
+    source_matrix = np.asarray(matrix[source_rows], dtype=np.float32)
+    query_embs = encoder.encode(queries, batch_size=64, convert_to_numpy=True)
+    top, _ = brute_force_search(query_embs, prefilter_k, source_matrix)
+    hashes = rows["content_hash"][source_rows]
+    return [
+        np.asarray(list(dict.fromkeys(i for j in query_top for i in rows_by_hash[hashes[j]])), dtype=int)
+        for query_top in top
+    ]
+
+# Cross-encode (query, doc) pairs for many queries at once, max_pairs per predict call
+def score_queries(queries, texts, candidates, max_pairs, batch_size):
+    groups, group, group_pairs = [], [], 0
+    for query, cands in zip(queries, candidates):
+        if group and group_pairs + len(cands) > max_pairs:
+            groups.append(group)
+            group, group_pairs = [], 0
+        group.append((query, cands))
+        group_pairs += len(cands)
+    if group:
+        groups.append(group)
+
+    for group in groups:
+        pairs = [(query, texts[i]) for query, cands in group for i in cands]
+        scores = model.predict(pairs, batch_size=batch_size, show_progress_bar=False)
+        offset = 0
+        for query, cands in group:
+            yield query, cands, scores[offset:offset + len(cands)]
+            offset += len(cands)
+
+# === Checkpointing ===
+# Finished queries are appended to a JSONL file so an interrupted run resumes
+# where it stopped; the final JSON is written in query order at the end. The
+# first line records the settings that affect relevance labels, and a run with
+# different settings refuses to resume rather than mixing the two.
+def load_checkpoint(path, params):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        return done
+    saved = json.loads(lines[0]).get("params")
+    if saved != params:
+        raise SystemExit(f"Checkpoint {path} was built with {saved}, this run uses {params}; "
+                         "rerun with the same settings or pass --restart")
+    for line in lines[1:]:
+        entry = json.loads(line)
+        done[entry["query"]] = entry
+    return done
+
+def build_test_collection(prefilter_k=0, max_pairs=16384, batch_size=256, restart=False):
+    output_dir = "evaluations/results"
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, "crossencoder_ndcg_test_collection.json")
+    checkpoint_file = os.path.join(output_dir, "crossencoder_ndcg_test_collection.partial.jsonl")
+
+    params = {"prefilter_k": prefilter_k}
+    done = {} if restart else load_checkpoint(checkpoint_file, params)
+    if done:
+        print(f"Resuming from checkpoint: {len(done)} queries already scored")
+
+    encoder = matrix = rows = None
+    if prefilter_k:
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+        from modules.module2.model_registry import get_model
+        from modules.module2.vector_store import load_embedding_matrix
+        # research_index is built with the fp32 encoder
+        encoder = get_model("roberta_fp32")
+        matrix, rows = load_embedding_matrix()
+        if "content_hash" not in rows.dtype.names:
+            raise SystemExit("The embedding export has no content hashes; "
+                             "re-export it with python -m modules.module2.vector_store --npy")
+
+    queries_by_intent = {}
+    for query, intent in query_intent_map.items():
+        if query not in done:
+            queries_by_intent.setdefault(intent, []).append(query)
+
+    with open(checkpoint_file, "a" if done else "w") as checkpoint, \
+            tqdm(total=sum(map(len, queries_by_intent.values())), desc="Processing queries") as progress:
+        if not done:
+            checkpoint.write(json.dumps({"params": params}) + "\n")
+        for intent, queries in queries_by_intent.items():
+            texts, doc_ids = source_documents(intent)
+            if prefilter_k and prefilter_k < len(texts):
+                candidates = dense_candidates(queries, intent, source_hashes(intent), prefilter_k, encoder, matrix, rows)
+            else:
+                candidates = [np.arange(len(texts))] * len(queries)
+            for query, cands, scores in score_queries(queries, texts, candidates, max_pairs, batch_size):
+                relevance_dict = {}
+                for i, score in zip(cands, scores):
+                    rel = score_to_relevance(score)
+                    if rel > 0:
+                        relevance_dict[doc_ids[i]] = rel
+                done[query] = {"query": query, "relevant_docs": relevance_dict}
+                checkpoint.write(json.dumps(done[query]) + "\n")
+                checkpoint.flush()
+                progress.update(1)
+
+    # Build the relevance-labeled test collection
+    test_collection = [done[query] for query in query_intent_map if query in done]
+    with open(output_file, "w") as f:
+        json.dump(test_collection, f, indent=2)
+    os.remove(checkpoint_file)
+
+    print(f"\nTest collection saved to: {output_file}")
+    return test_collection
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the cross-encoder relevance test collection.")
+    parser.add_argument("--prefilter-k", type=int, default=0,
+                        help="cross-encode only the top K documents per query from the dense index (0 = all)")
+    parser.add_argument("--max-pairs", type=int, default=16384, help="query-document pairs per predict call")
+    parser.add_argument("--batch-size", type=int, default=256, help="cross-encoder batch size")
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint and score every query")
+    args = parser.parse_args()
+    build_test_collection(args.prefilter_k, args.max_pairs, args.batch_size, args.restart)
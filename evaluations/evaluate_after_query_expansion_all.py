@@ -7,7 +7,7 @@ from transformers import pipeline
 
 # Add the project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from modules.module2.roberta_query import search_expanded_query
+from modules.module2.hybrid_search import retrieve
 
 def ndcg_score(relevances, k=10):
     def dcg(scores):
@@ -28,7 +28,7 @@ def recall_at_k(relevances, total_relevant, k=10):
     retrieved_relevant = sum(1 for rel in relevances[:k] if rel > 0)
     return retrieved_relevant / max(1, total_relevant)
 
-def evaluate(k):
+def evaluate(k, mode="reencode", retriever="dense"):
     with open("./evaluations/evaluations/results/crossencoder_ndcg_test_collection.json", "r") as f:
         ground_truth = json.load(f)
 
@@ -40,7 +40,7 @@ def evaluate(k):
     for item in ground_truth:
         query = item["query"]
         relevance_dict = item["relevant_docs"]
-        raw_results = search_expanded_query(query, top_k=45)
+        raw_results = retrieve(query, top_k=45, retriever=retriever, mode=mode)
 
         metadatas = raw_results["metadatas"][0]
         retrieved_ids = [meta["doc_id"] for meta in metadatas[:k]]
@@ -59,6 +59,8 @@ def evaluate(k):
 
         detailed_results.append({
             "query": query,
+            "retriever": raw_results["retriever"],
+            "mode": raw_results["mode"],
             "ndcg@10": round(score_ndcg, 4),
             "map@10": round(score_map, 4),
             "recall@10": round(score_recall, 4)
@@ -78,8 +80,14 @@ def evaluate(k):
     avg_map = sum(map_scores) / len(map_scores) if map_scores else 0.0
     avg_recall = sum(recall_scores) / len(recall_scores) if recall_scores else 0.0
     print("No. of queries : ", len(ndcg))
-    print(f"\n✅ Evaluation (raw results) completed — Avg NDCG@10: {avg_ndcg:.4f} | Avg MAP@10: {avg_map:.4f} | Avg Recall@10: {avg_recall:.4f}")
+    print(f"\n✅ Evaluation (raw results, {mode}, {retriever}) completed — Avg NDCG@10: {avg_ndcg:.4f} | Avg MAP@10: {avg_map:.4f} | Avg Recall@10: {avg_recall:.4f}")
     return detailed_results
 
 if __name__ == "__main__":
-    evaluate(10)
+    # argv[1]: "reencode" or "centroid" (fused search without re-encoding the expanded query)
+    # argv[2]: "dense", "hybrid" (BM25 + dense with reciprocal rank fusion) or "intent" (per-source quotas)
+    evaluate(
+        10,
+        mode=sys.argv[1] if len(sys.argv) > 1 else "reencode",
+        retriever=sys.argv[2] if len(sys.argv) > 2 else "dense"
+    )
@@ -8,7 +8,7 @@ nltk.download('punkt_tab')
 
 # Add module path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from modules.module1.basic_bm25_with_qe import integrated_search
+from modules.module1.basic_bm25_with_qe import batch_search, get_bm25_index
 
 # -------------------------------
 # Scoring Functions
@@ -45,6 +45,10 @@ def evaluate(k):
         print("❌ Error: Ground truth file not found.")
         return
 
+    # Build or load the BM25 index once and score the whole query set in one call
+    index = get_bm25_index()
+    batch = batch_search([item["query"] for item in ground_truth], top_k=45, index=index)
+
     ndcg = []
     map_scores = []
     recall_scores = []
@@ -56,17 +60,12 @@ def evaluate(k):
 
         print(f"\n🔍 [{idx+1}/{len(ground_truth)}] Processing query: {query}")
 
-        try:
-            results = integrated_search(query, top_k=45)
-        except Exception as e:
-            print(f"❌ Error running integrated search for query: {query}\n   {e}")
-            continue
-
         flat_results = []
-        for source, records in results.items():
-            for doc, score in records:
-                doc_id = str(doc.get("doc_id", ""))
-                flat_results.append((doc_id, score))
+        for source, (top_indices, top_scores) in batch.items():
+            records = index[source]["records"]
+            for i, score in zip(top_indices[idx], top_scores[idx]):
+                doc_id = str(records[i].get("doc_id", ""))
+                flat_results.append((doc_id, float(score)))
 
         flat_results.sort(key=lambda x: x[1], reverse=True)
         retrieved_ids = [doc_id for doc_id, _ in flat_results[:k]]
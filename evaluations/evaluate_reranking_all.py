@@ -3,26 +3,12 @@ import json
 import numpy as np
 import pandas as pd
 import sys
-from transformers import pipeline
 
 # Add the project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from modules.module2.roberta_query import search_expanded_query
-
-classifier = pipeline("text-classification", model="./modules/module2/intent_model", tokenizer="./modules/module2/intent_model", device=0)
-
-def detect_intent(query: str) -> str:
-    result = classifier(query)[0]
-    print("Predicted intent:", result["label"], "Score:", result["score"])
-    return result["label"]
-
-INTENT_PRIORITY = {
-    "Research": ["Research", "Highlights", "Professors", "Labs", "Institutes"],
-    "Professors": ["Professors", "Labs", "Research", "Highlights", "Institutes"],
-    "Labs": ["Labs", "Professors", "Research", "Highlights", "Institutes"],
-    "Institutes": ["Institutes", "Labs", "Professors", "Research", "Highlights"],
-    "Research_current_highlights": ["Research_current_highlights", "Research", "Professors", "Labs", "Institutes"],
-}
+from modules.module2.hybrid_search import retrieve
+from modules.module2.intent_search import INTENT_PRIORITY
+from modules.module2.intent_classifier import detect_intents, intent_cache
 
 def rerank_by_intent(results, intent):
     docs = results["documents"][0]
@@ -61,21 +47,24 @@ def recall_at_k(relevances, total_relevant, k=10):
     retrieved_relevant = sum(1 for rel in relevances[:k] if rel > 0)
     return retrieved_relevant / max(1, total_relevant)
 
-def evaluate(k):
+def evaluate(k, mode="reencode", retriever="dense"):
     with open("./evaluations/evaluations/results/crossencoder_ndcg_test_collection.json", "r") as f:
         ground_truth = json.load(f)
 
+    # Classify every test query in one batched pass (cached for repeat runs in-process)
+    intents = detect_intents([item["query"] for item in ground_truth])
+    print(f"🧠 Intent cache: {intent_cache.stats()}")
+
     ndcg = []
     map_scores = []
     recall_scores = []
     detailed_results = []
 
-    for item in ground_truth:
+    for item, intent in zip(ground_truth, intents):
         query = item["query"]
         relevance_dict = item["relevant_docs"]
 
-        raw_results = search_expanded_query(query, top_k=45)
-        intent = detect_intent(query)
+        raw_results = retrieve(query, top_k=45, retriever=retriever, mode=mode, intent=intent)
         ranked = rerank_by_intent(raw_results, intent)[:k]
 
         retrieved_ids = [meta["doc_id"] for _, meta, _ in ranked]
@@ -94,6 +83,8 @@ def evaluate(k):
 
         detailed_results.append({
             "query": query,
+            "retriever": raw_results["retriever"],
+            "mode": raw_results["mode"],
             "ndcg@10": round(score_ndcg, 4),
             "map@10": round(score_map, 4),
             "recall@10": round(score_recall, 4)
@@ -112,8 +103,14 @@ def evaluate(k):
     avg_ndcg = sum(ndcg) / len(ndcg) if ndcg else 0.0
     avg_map = sum(map_scores) / len(map_scores) if map_scores else 0.0
     avg_recall = sum(recall_scores) / len(recall_scores) if recall_scores else 0.0
-    print(f"\n✅ Evaluation completed after reranking — Avg NDCG@10: {avg_ndcg:.4f} | Avg MAP@10: {avg_map:.4f} | Avg Recall@10: {avg_recall:.4f}")
+    print(f"\n✅ Evaluation completed after reranking ({mode}, {retriever}) — Avg NDCG@10: {avg_ndcg:.4f} | Avg MAP@10: {avg_map:.4f} | Avg Recall@10: {avg_recall:.4f}")
     return detailed_results
 
 if __name__ == "__main__":
-    evaluate(10)
+    # argv[1]: "reencode" or "centroid" (fused search without re-encoding the expanded query)
+    # argv[2]: "dense", "hybrid" (BM25 + dense with reciprocal rank fusion) or "intent" (per-source quotas)
+    evaluate(
+        10,
+        mode=sys.argv[1] if len(sys.argv) > 1 else "reencode",
+        retriever=sys.argv[2] if len(sys.argv) > 2 else "dense"
+    )
@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import time
+import random
+import numpy as np
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from modules.module2.model_registry import get_model, use_model
+from modules.module2.embedding_cache import query_embedding_cache
+from modules.module2.roberta_index import load_documents
+from modules.module2.roberta_query import search_fused
+
+# -------------------------------
+# Scoring Functions
+# -------------------------------
+def ndcg_score(relevances, k=10):
+    def dcg(scores):
+        return sum(rel / np.log2(idx + 2) for idx, rel in enumerate(scores[:k]))
+    ideal = sorted(relevances, reverse=True)
+    return dcg(relevances) / (dcg(ideal) or 1.0)
+
+def cosine_rows(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+# -------------------------------
+# Embedding agreement over the corpus
+# -------------------------------
+def embedding_agreement(max_docs=500, seed=42):
+    texts, _, _ = load_documents()
+    random.Random(seed).shuffle(texts)
+    texts = texts[:max_docs]
+
+    report = {"num_docs": len(texts)}
+    embeddings = {}
+    for variant in ("roberta_fp32", "roberta_int8"):
+        model = get_model(variant)
+        start = time.perf_counter()
+        embeddings[variant] = model.encode(texts, convert_to_numpy=True)
+        report[f"{variant}_encode_s"] = round(time.perf_counter() - start, 3)
+
+    sims = cosine_rows(embeddings["roberta_fp32"], embeddings["roberta_int8"])
+    report.update({
+        "cosine_mean": round(float(sims.mean()), 5),
+        "cosine_min": round(float(sims.min()), 5),
+        "cosine_p5": round(float(np.percentile(sims, 5)), 5)
+    })
+    return report
+
+# -------------------------------
+# NDCG with each query encoder
+# -------------------------------
+def ndcg_by_variant(k=10, mode="centroid"):
+    with open("./evaluations/evaluations/results/crossencoder_ndcg_test_collection.json", "r") as f:
+        ground_truth = json.load(f)
+
+    report = {}
+    for variant in ("roberta_fp32", "roberta_int8"):
+        use_model("roberta", variant)
+        query_embedding_cache.clear()
+
+        scores = []
+        start = time.perf_counter()
+        for item in ground_truth:
+            results = search_fused(item["query"], top_k=45, mode=mode)
+            retrieved_ids = [meta["doc_id"] for meta in results["metadatas"][0][:k]]
+            relevances = [item["relevant_docs"].get(str(doc_id), 0) for doc_id in retrieved_ids]
+            scores.append(ndcg_score(relevances, k))
+        report[variant] = {
+            f"ndcg@{k}": round(float(np.mean(scores)), 4),
+            "avg_query_ms": round((time.perf_counter() - start) * 1000 / max(1, len(ground_truth)), 2)
+        }
+
+    report[f"ndcg@{k}_delta"] = round(report["roberta_int8"][f"ndcg@{k}"] - report["roberta_fp32"][f"ndcg@{k}"], 4)
+    return report
+
+# -------------------------------
+# Entry Point
+# -------------------------------
+if __name__ == "__main__":
+    print("\n🚀 Checking int8 query encoder against fp32...\n")
+    report = {
+        "embedding_agreement": embedding_agreement(),
+        "retrieval": ndcg_by_variant()
+    }
+    print(json.dumps(report, indent=2))
+
+    os.makedirs("./evaluations/results", exist_ok=True)
+    output_path = "./evaluations/results/quantization_guard.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Results saved to: {output_path}")
@@ -1,11 +1,27 @@
+import os
+import time
 import streamlit as st
-from modules.module2.roberta_query import search_expanded_query
+from modules.module2.hybrid_search import retrieve
+from modules.module2.cross_rerank import rerank
 from modules.module2.intent_classifier import detect_intent
+from modules.module2.intent_search import INTENT_PRIORITY
 
 st.set_page_config(page_title="Semantic Search Chat", layout="wide")
 st.title("💬 Semantic Search Chat")
 st.caption("Powered by Roberta + ChromaDB + Intent-Aware Ranking")
 
+# "reencode" embeds the expanded query string, "centroid" reuses the expansion
+# embeddings (faster, but opt-in until evaluation shows it matches reencode)
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "reencode")
+# "dense" searches research_index only, "hybrid" fuses it with BM25,
+# "intent" runs per-source filtered queries with quotas from INTENT_PRIORITY
+RETRIEVER = os.environ.get("RETRIEVER", "dense")
+# Optional cross-encoder pass over the first RERANK_TOP_N candidates; batches
+# stop once RERANK_BUDGET_MS is spent (0 disables the budget)
+RERANK = os.environ.get("RERANK", "0") == "1"
+RERANK_TOP_N = int(os.environ.get("RERANK_TOP_N", 20))
+RERANK_BUDGET_MS = float(os.environ.get("RERANK_BUDGET_MS", 300)) or None
+
 # Initialize session state
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
@@ -14,29 +30,26 @@ if "searching" not in st.session_state:
     st.session_state.searching = False
 
 # === Helper to sort results by intent-based preference ===
-INTENT_PRIORITY = {
-    "Research": ["Research", "Highlights", "Professors", "Labs", "Institutes"],
-    "Professors": ["Professors", "Labs", "Research", "Highlights", "Institutes"],
-    "Labs": ["Labs", "Professors", "Research", "Highlights", "Institutes"],
-    "Institutes": ["Institutes", "Labs", "Professors", "Research", "Highlights"],
-    "Research_current_highlights": ["Research_current_highlights", "Research", "Professors", "Labs", "Institutes"],
-}
 def rerank_by_intent(results, intent):
     docs = results["documents"][0]
     metas = results["metadatas"][0]
     distances = results["distances"][0]
+    rerank_scores = results.get("rerank_scores", [[None] * len(docs)])[0]
 
     def score(item):
-        doc, meta, dist = item
+        doc, meta, dist, rerank_score = item
         source_priority = INTENT_PRIORITY.get(intent, [])
         base_score = 1 / (1 + dist)
         try:
             priority = source_priority.index(meta["source"])
         except ValueError:
             priority = len(source_priority)
-        return -priority, base_score  # first by source type, then by semantic score
+        # first by source type, then cross-encoder scored before unscored, then by score
+        if rerank_score is not None:
+            return -priority, 1, rerank_score
+        return -priority, 0, base_score
 
-    ranked = sorted(zip(docs, metas, distances), key=score, reverse=True)
+    ranked = sorted(zip(docs, metas, distances, rerank_scores), key=score, reverse=True)
     return ranked
 
 # Input + Button (disabled while searching)
@@ -50,18 +63,38 @@ if submit_button and user_input:
     st.session_state.chat_history.append(user_input)
 
     with st.spinner("🔍 Expanding and searching..."):
-        raw_results = search_expanded_query(user_input, top_k=45)
+        timings = {}
+        start = time.perf_counter()
         intent = detect_intent(user_input)
-        print(intent)
+        timings["intent_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        raw_results = retrieve(user_input, top_k=45, retriever=RETRIEVER, mode=SEARCH_MODE, intent=intent)
+        timings["retrieve_ms"] = (time.perf_counter() - start) * 1000
+
+        if RERANK:
+            start = time.perf_counter()
+            raw_results = rerank(user_input, raw_results, top_n=RERANK_TOP_N, budget_ms=RERANK_BUDGET_MS)
+            timings["rerank_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
         ranked_results = rerank_by_intent(raw_results, intent)
+        timings["sort_ms"] = (time.perf_counter() - start) * 1000
+        timings = {stage: round(ms, 1) for stage, ms in timings.items()}
+        print(intent, timings)
 
     st.markdown(f"### 🔎 Top Results for Intent: `{intent}`")
-    for i, (doc, meta, dist) in enumerate(ranked_results):
+    stage_summary = " | ".join(f"{stage[:-3]}: {ms} ms" for stage, ms in timings.items())
+    if RERANK and raw_results["rerank"]["truncated"]:
+        stage_summary += f" | reranked {raw_results['rerank']['scored']}/{raw_results['rerank']['requested']} (budget hit)"
+    st.caption(f"⏱️ {stage_summary}")
+    for i, (doc, meta, dist, rerank_score) in enumerate(ranked_results):
         score = round(1 / (1 + dist), 4)
+        rerank_label = f" &nbsp;&nbsp; 🎯 Rerank: {rerank_score:.3f}" if rerank_score is not None else ""
         st.markdown(
             f"""
             <div style="border:1px solid #CCC;padding:15px;border-radius:10px;margin-bottom:15px;background-color:#000000">
-                <h5 style="margin:0 0 10px;">📁 Source: {meta['source']} &nbsp;&nbsp; 🆔 Doc ID: {meta['doc_id']} &nbsp;&nbsp; ⭐ Score: {score}</h5>
+                <h5 style="margin:0 0 10px;">📁 Source: {meta['source']} &nbsp;&nbsp; 🆔 Doc ID: {meta['doc_id']} &nbsp;&nbsp; ⭐ Score: {score}{rerank_label}</h5>
                 <p style="margin:0;font-size:16px;line-height:1.6;">{doc}</p>
             </div>
             """,
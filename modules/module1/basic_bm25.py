@@ -1,4 +1,5 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
 import pandas as pd
 from rank_bm25 import BM25Okapi
 import nltk
@@ -24,11 +25,30 @@ def build_bm25(df):
     bm25 = BM25Okapi(tokenized_docs)
     return bm25
 
+# Partial selection of the k best columns (O(n)), then a sort of only those k.
+# Works on a single score vector or row-wise on a (num_queries, num_docs) matrix.
+# Ties are broken by document position, matching a stable descending sort.
+def top_k_indices(scores, k):
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    k = max(0, min(k, n))
+    if 0 < k < n:
+        kth = -np.partition(-scores, k - 1, axis=-1)[..., k - 1:k]
+        above = scores > kth
+        ties = scores == kth
+        needed = k - above.sum(axis=-1, keepdims=True)
+        keep = above | (ties & (np.cumsum(ties, axis=-1) <= needed))
+        winners = np.nonzero(keep)[-1].reshape(scores.shape[:-1] + (k,))
+    else:
+        winners = np.broadcast_to(np.arange(n), scores.shape)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, winners, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(winners, order, axis=-1)
+
 def search_bm25(bm25, query, df, top_k=5):
     tokenized_query = word_tokenize(query.lower())
-    scores = bm25.get_scores(tokenized_query)
-    ranked_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
-    return df.iloc[ranked_indices], [scores[i] for i in ranked_indices]
+    scores = np.asarray(bm25.get_scores(tokenized_query))
+    ranked_indices = top_k_indices(scores, top_k)
+    return df.iloc[ranked_indices], scores[ranked_indices].tolist()
 
 if __name__ == "__main__":
     df = get_publication_data()
@@ -105,25 +105,41 @@
 #             for key, value in row.items():
 #                 print(f"    {key}: {value}")
 import os
+import pickle
+from collections import Counter
+import numpy as np
 import pandas as pd
+from scipy import sparse
 import nltk
 from nltk.tokenize import word_tokenize
 from rank_bm25 import BM25Okapi
+from modules.module1.basic_bm25 import top_k_indices
 nltk.download("punkt_tab")
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 DATA_DIR = os.path.join(PROJECT_ROOT, "modules", "data")
+BM25_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "bm25")
+BM25_INDEX_PATH = os.path.join(BM25_DIR, "bm25_index.pkl")
+
+SOURCE_PATHS = {
+    "Professors": os.path.join(DATA_DIR,"final_prof_details.csv"),
+    "Labs": os.path.join(DATA_DIR,"final_lab_summaries.csv"),
+    "Research": os.path.join(DATA_DIR,"final_research_info.csv"),
+    "Institutes": os.path.join(DATA_DIR,"institutes_and_centers.csv"),
+    "Highlights": os.path.join(DATA_DIR,"current_research_highlights.csv")
+}
+
+SOURCE_COLUMNS = {
+    "Professors": ["Professor Name", "Research Area", "Biography", "Research Interests", "doc_id"],
+    "Labs": ["Research Area", "Lab Name", "Summary", "doc_id"],
+    "Research": ["Research Area", "Professor Name", "Publication Title", "Citation", "Publication Summary", "doc_id"],
+    "Institutes": ["name", "description", "doc_id"],
+    "Highlights": ["title", "description", "doc_id"]
+}
 
 # ===== Load CSVs =====
 def load_data():
-    paths = {
-        "Professors": os.path.join(DATA_DIR,"final_prof_details.csv"),
-        "Labs": os.path.join(DATA_DIR,"final_lab_summaries.csv"),
-        "Research": os.path.join(DATA_DIR,"final_research_info.csv"),
-        "Institutes": os.path.join(DATA_DIR,"institutes_and_centers.csv"),
-        "Highlights": os.path.join(DATA_DIR,"current_research_highlights.csv")
-    }
-    return {name: pd.read_csv(path) for name, path in paths.items()}
+    return {name: pd.read_csv(path) for name, path in SOURCE_PATHS.items()}
 
 # ===== Generic Preprocessing =====
 def preprocess_text(df, cols):
@@ -139,28 +155,144 @@ def build_bm25(df):
 # ===== Search Top-k =====
 def search(query, model, df, top_k=5):
     tokens = word_tokenize(query.lower())
-    scores = model.get_scores(tokens)
-    top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
-    return df.iloc[top_indices], [scores[i] for i in top_indices]
+    scores = np.asarray(model.get_scores(tokens))
+    top_indices = top_k_indices(scores, top_k)
+    return df.iloc[top_indices], scores[top_indices].tolist()
 
-# ===== Unified Search Across Sources =====
-def integrated_search(query, top_k=5):
-    dfs = load_data()
-
-    configs = {
-        "Professors": ["Professor Name", "Research Area", "Biography", "Research Interests", "doc_id"],
-        "Labs": ["Research Area", "Lab Name", "Summary", "doc_id"],
-        "Research": ["Research Area", "Professor Name", "Publication Title", "Citation", "Publication Summary", "doc_id"],
-        "Institutes": ["name", "description", "doc_id"],
-        "Highlights": ["title", "description", "doc_id"]
+# ===== Sparse BM25 (Okapi) =====
+# Same scoring as rank_bm25.BM25Okapi, but the per-(term, doc) BM25 weights are
+# precomputed into a CSR term-document matrix, so a query is a sparse row
+# gather plus a dot product instead of a Python loop over every document.
+class SparseBM25:
+    def __init__(self, vocab, weights):
+        self.vocab = vocab
+        self.weights = weights  # CSR, shape (num_terms, num_docs)
+
+    @classmethod
+    def from_tokenized(cls, tokenized_docs, k1=1.5, b=0.75, epsilon=0.25):
+        vocab = {}
+        rows, cols, freqs = [], [], []
+        doc_len = np.zeros(len(tokenized_docs), dtype=np.float32)
+        for d, tokens in enumerate(tokenized_docs):
+            doc_len[d] = len(tokens)
+            for token, freq in Counter(tokens).items():
+                rows.append(vocab.setdefault(token, len(vocab)))
+                cols.append(d)
+                freqs.append(freq)
+
+        num_docs = len(tokenized_docs)
+        tf = sparse.csr_matrix((freqs, (rows, cols)), shape=(len(vocab), num_docs), dtype=np.float32)
+        avgdl = doc_len.sum() / max(num_docs, 1)
+
+        # Negative idf values are floored to epsilon * mean idf, as in BM25Okapi
+        doc_freq = np.diff(tf.indptr)
+        idf = np.log(num_docs - doc_freq + 0.5) - np.log(doc_freq + 0.5)
+        idf[idf < 0] = epsilon * idf.mean() if len(idf) else 0.0
+
+        term_of_entry = np.repeat(np.arange(len(vocab)), doc_freq)
+        norm = k1 * (1 - b + b * doc_len[tf.indices] / (avgdl or 1.0))
+        tf.data = (idf[term_of_entry] * tf.data * (k1 + 1) / (tf.data + norm)).astype(np.float32)
+        return cls(vocab, tf)
+
+    def get_scores(self, tokens):
+        term_ids = [self.vocab[t] for t in tokens if t in self.vocab]
+        if not term_ids:
+            return np.zeros(self.weights.shape[1], dtype=np.float32)
+        unique_ids, counts = np.unique(term_ids, return_counts=True)
+        return np.asarray(self.weights[unique_ids].T @ counts.astype(np.float32)).ravel()
+
+    def get_batch_scores(self, token_lists):
+        # One sparse (num_queries, num_terms) x (num_terms, num_docs) product for all queries
+        rows, cols = [], []
+        for q, tokens in enumerate(token_lists):
+            for t in tokens:
+                if t in self.vocab:
+                    rows.append(q)
+                    cols.append(self.vocab[t])
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(token_lists), len(self.vocab))
+        )
+        return (counts @ self.weights).toarray()
+
+    def to_state(self):
+        return {"vocab": self.vocab, "weights": self.weights}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["vocab"], state["weights"])
+
+# ===== Persistent Index =====
+def source_fingerprint():
+    return {name: os.path.getmtime(path) for name, path in SOURCE_PATHS.items() if os.path.exists(path)}
+
+def build_bm25_index(path=BM25_INDEX_PATH):
+    print("🔧 Building BM25 index...")
+    index = {}
+    for name, df in load_data().items():
+        df = preprocess_text(df, SOURCE_COLUMNS[name])
+        tokenized = [word_tokenize(doc.lower()) for doc in df["Text"]]
+        index[name] = {
+            "model": SparseBM25.from_tokenized(tokenized),
+            "records": df.to_dict("records")
+        }
+        print(f"  ✅ {name}: {len(df)} docs, {len(index[name]['model'].vocab)} terms")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state = {
+        "fingerprint": source_fingerprint(),
+        "sources": {name: {"model": entry["model"].to_state(), "records": entry["records"]}
+                    for name, entry in index.items()}
     }
+    with open(path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"📁 BM25 index saved to: {path}")
+    return index
+
+def load_bm25_index(path=BM25_INDEX_PATH, rebuild_if_stale=True):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if not rebuild_if_stale or state["fingerprint"] == source_fingerprint():
+            return {name: {"model": SparseBM25.from_state(entry["model"]), "records": entry["records"]}
+                    for name, entry in state["sources"].items()}
+        print("⚠️ BM25 index is older than the source CSVs, rebuilding...")
+    return build_bm25_index(path)
+
+_bm25_index = None
+
+def get_bm25_index():
+    # Loaded once per process and shared by every search call
+    global _bm25_index
+    if _bm25_index is None:
+        _bm25_index = load_bm25_index()
+    return _bm25_index
+
+# ===== Unified Search Across Sources =====
+def integrated_search(query, top_k=5, index=None):
+    index = index if index is not None else get_bm25_index()
+    tokens = word_tokenize(query.lower())
+
+    results = {}
+    for name, entry in index.items():
+        scores = entry["model"].get_scores(tokens)
+        top_indices = top_k_indices(scores, top_k)
+        results[name] = [(entry["records"][i], float(scores[i])) for i in top_indices]
+
+    return results
+
+# ===== Batched Search Across Sources =====
+# Returns {source: (indices, scores)} with both arrays shaped (num_queries, k);
+# indices point into index[source]["records"].
+def batch_search(queries, top_k=5, index=None):
+    index = index if index is not None else get_bm25_index()
+    token_lists = [word_tokenize(q.lower()) for q in queries]
 
     results = {}
-    for name, df in dfs.items():
-        df = preprocess_text(df, configs[name])
-        model, _ = build_bm25(df)
-        top_df, top_scores = search(query, model, df, top_k)
-        results[name] = list(zip(top_df.to_dict("records"), top_scores))
+    for name, entry in index.items():
+        scores = entry["model"].get_batch_scores(token_lists)
+        top_indices = top_k_indices(scores, top_k)
+        results[name] = (top_indices, np.take_along_axis(scores, top_indices, axis=-1))
 
     return results
 
@@ -0,0 +1,52 @@
+# modules/module2/cross_rerank.py
+
+import time
+from modules.module2.model_registry import get_model
+
+# === Second-stage cross-encoder reranking ===
+# Rescores the first top_n retrieved candidates (in retrieval order) with the
+# ms-marco cross-encoder. Pairs are scored in batches; with a latency budget
+# the batches shrink to BUDGET_SUB_BATCH pairs, and a sub-batch is only started
+# if it is expected (from the per-pair cost so far) to finish within budget.
+# Candidates the budget did not reach keep their first-stage order behind the
+# scored ones.
+
+BUDGET_SUB_BATCH = 8
+
+def rerank(query, results, top_n=20, batch_size=32, budget_ms=None):
+    docs = results["documents"][0]
+    metas = results["metadatas"][0]
+    distances = results["distances"][0]
+    candidates = docs[:top_n]
+
+    model = get_model("cross_encoder")
+    start = time.perf_counter()
+    step = batch_size if budget_ms is None else min(batch_size, BUDGET_SUB_BATCH)
+    scores = []
+    for i in range(0, len(candidates), step):
+        batch = candidates[i:i + step]
+        if budget_ms is not None:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            per_pair_ms = elapsed_ms / len(scores) if scores else 0.0
+            if elapsed_ms + per_pair_ms * len(batch) > budget_ms:
+                break
+        scores.extend(float(s) for s in model.predict([(query, doc) for doc in batch], batch_size=step))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    scored = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+    order = scored + list(range(len(scores), len(docs)))
+    reranked = dict(results)
+    reranked.update({
+        "documents": [[docs[i] for i in order]],
+        "metadatas": [[metas[i] for i in order]],
+        "distances": [[distances[i] for i in order]],
+        # None for candidates the budget did not reach
+        "rerank_scores": [[scores[i] if i < len(scores) else None for i in order]],
+        "rerank": {
+            "scored": len(scores),
+            "requested": len(candidates),
+            "truncated": len(scores) < len(candidates),
+            "ms": round(elapsed_ms, 1)
+        }
+    })
+    return reranked
@@ -0,0 +1,85 @@
+# modules/module2/embedding_cache.py
+
+import re
+import threading
+from collections import OrderedDict
+from modules.module2.model_registry import active_variant, get_model
+
+# === Query-keyed LRU caches ===
+# The embedding cache is shared by query expansion (roberta_qe) and search
+# (roberta_query) so a repeated query is only run through the encoder once per
+# process; intent_classifier keeps its own LRUCache of predicted labels.
+# Embeddings are keyed by the model variant that produced them, so switching
+# e.g. "roberta" from fp32 to int8 never serves vectors from the other model.
+# The RoBERTa encoder is case-sensitive, so embedding keys only collapse
+# whitespace, and the key text is exactly what gets encoded.
+
+DEFAULT_MAX_SIZE = 1024
+
+def normalize_whitespace(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+def normalize_query(text):
+    return normalize_whitespace(text).lower()
+
+class LRUCache:
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        with self._lock:
+            value = self._store.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def store(self, key, value):
+        with self._lock:
+            self._store[key] = value
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_size:
+                self._store.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._store),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class QueryEmbeddingCache(LRUCache):
+    def get(self, variant, text):
+        return self.lookup((variant, normalize_whitespace(text)))
+
+    def put(self, variant, text, embedding):
+        # Cached arrays are shared between callers, so freeze them
+        embedding.setflags(write=False)
+        self.store((variant, normalize_whitespace(text)), embedding)
+
+query_embedding_cache = QueryEmbeddingCache()
+
+def encode_query(name, text, device=None):
+    # `name` is a registry name such as "roberta"; the cache key uses the variant behind it
+    variant = active_variant(name)
+    text = normalize_whitespace(text)
+    embedding = query_embedding_cache.get(variant, text)
+    if embedding is None:
+        embedding = get_model(variant).encode(text, convert_to_numpy=True, device=device)
+        query_embedding_cache.put(variant, text, embedding)
+    return embedding
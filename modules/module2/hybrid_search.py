@@ -0,0 +1,128 @@
+# modules/module2/hybrid_search.py
+
+from concurrent.futures import ThreadPoolExecutor
+from modules.module2.roberta_query import search_fused
+from modules.module2.roberta_index import content_hash, document_text
+from modules.module2.vector_store import get_vector_store
+from modules.module2.intent_search import intent_filtered_search
+
+# === Hybrid BM25 + dense retrieval ===
+# BM25 (module1) and the expanded dense search (module2) run concurrently and
+# their ranked lists are fused. Documents are matched across the two systems by
+# the content hash of their indexed text, since the two use different doc_ids.
+
+RETRIEVERS = ("dense", "hybrid", "intent")
+FUSION_METHODS = ("rrf", "weighted")
+RRF_K = 60
+
+# BM25 source names that differ from the research_index "source" metadata
+BM25_SOURCE_NAMES = {"Highlights": "Research_current_highlights"}
+
+_executor = ThreadPoolExecutor(max_workers=2)
+
+def bm25_ranked(query, top_k):
+    # Imported here so dense-only callers skip NLTK setup and the BM25 index load
+    from modules.module1.basic_bm25_with_qe import integrated_search
+
+    hits = []
+    for source, items in integrated_search(query, top_k=top_k).items():
+        for record, score in items:
+            text = document_text(record, exclude={"Text"})
+            if score <= 0 or not text:
+                continue
+            hits.append({
+                "key": content_hash(text),
+                "document": text,
+                "metadata": {"source": BM25_SOURCE_NAMES.get(source, source), "doc_id": record.get("doc_id")},
+                "score": float(score)
+            })
+    hits.sort(key=lambda h: h["score"], reverse=True)
+    return hits[:top_k]
+
+def dense_ranked(query, top_k, mode):
+    results = search_fused(query, top_k=top_k, mode=mode)
+    hits = []
+    for doc, meta, dist in zip(results["documents"][0], results["metadatas"][0], results["distances"][0]):
+        hits.append({
+            "key": meta.get("content_hash") or content_hash(doc),
+            "document": doc,
+            "metadata": meta,
+            "score": 1 / (1 + dist)
+        })
+    return hits, results
+
+def fuse(ranked_lists, method="rrf", weights=None, rrf_k=RRF_K):
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{method}', expected one of {FUSION_METHODS}")
+    weights = weights or [1.0] * len(ranked_lists)
+
+    fused = {}
+    hits_by_key = {}
+    for hits, weight in zip(ranked_lists, weights):
+        if method == "weighted" and hits:
+            # Min-max normalise so BM25 and cosine scores are on the same scale
+            scores = [h["score"] for h in hits]
+            lo, hi = min(scores), max(scores)
+        for rank, hit in enumerate(hits):
+            if method == "rrf":
+                contribution = weight / (rrf_k + rank + 1)
+            else:
+                contribution = weight * ((hit["score"] - lo) / (hi - lo) if hi > lo else 1.0)
+            fused[hit["key"]] = fused.get(hit["key"], 0.0) + contribution
+            hits_by_key.setdefault(hit["key"], hit)
+
+    ranked = sorted(fused.items(), key=lambda x: x[1], reverse=True)
+    return [(hits_by_key[key], score) for key, score in ranked]
+
+def resolve_metadata(hits):
+    # BM25-only hits carry CSV doc_ids; swap in the research_index metadata so
+    # every result uses the same doc_id space as the dense path
+    keys = [h["key"] for h in hits if "content_hash" not in h["metadata"]]
+    if not keys:
+        return
+    by_key = get_vector_store().metadatas_by_hash(keys)
+    for hit in hits:
+        if hit["key"] in by_key:
+            hit["metadata"] = by_key[hit["key"]]
+
+def hybrid_search(query, top_k=15, mode="reencode", fusion="rrf", dense_weight=0.5, candidate_k=None):
+    candidate_k = candidate_k or top_k
+
+    # Both retrievers run at once, so latency is roughly the slower of the two
+    dense_future = _executor.submit(dense_ranked, query, candidate_k, mode)
+    bm25_future = _executor.submit(bm25_ranked, query, candidate_k)
+    dense_hits, dense_results = dense_future.result()
+    bm25_hits = bm25_future.result()
+
+    fused = fuse([dense_hits, bm25_hits], method=fusion, weights=[dense_weight, 1 - dense_weight])[:top_k]
+    resolve_metadata([hit for hit, _ in fused])
+
+    # Same shape as a Chroma query result; distance is derived from the fused
+    # score so that 1 / (1 + distance) keeps the fused ordering
+    top_score = fused[0][1] if fused else 1.0
+    return {
+        "documents": [[hit["document"] for hit, _ in fused]],
+        "metadatas": [[hit["metadata"] for hit, _ in fused]],
+        "distances": [[top_score / max(score, 1e-9) - 1 for _, score in fused]],
+        "scores": [[score for _, score in fused]],
+        "retriever": "hybrid",
+        "fusion": fusion,
+        "mode": mode,
+        "expanded_query": dense_results["expanded_query"],
+        "expansion_terms": dense_results["expansion_terms"]
+    }
+
+# === Retriever switch used by the app and evaluation scripts ===
+def retrieve(query, top_k=15, retriever="dense", mode="reencode", intent=None, **kwargs):
+    if retriever not in RETRIEVERS:
+        raise ValueError(f"Unknown retriever '{retriever}', expected one of {RETRIEVERS}")
+    if retriever == "hybrid":
+        return hybrid_search(query, top_k=top_k, mode=mode, **kwargs)
+    if retriever == "intent":
+        if intent is None:
+            from modules.module2.intent_classifier import detect_intent
+            intent = detect_intent(query)
+        return intent_filtered_search(query, intent, top_k=top_k, mode=mode)
+    results = search_fused(query, top_k=top_k, mode=mode)
+    results["retriever"] = "dense"
+    return results
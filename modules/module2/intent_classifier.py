@@ -1,24 +1,51 @@
-from transformers import pipeline
-import torch
 import os
+from modules.module2.model_registry import get_model
+from modules.module2.embedding_cache import LRUCache, normalize_query
 
 # === Paths ===
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 MODELS_DIR = os.path.join(PROJECT_ROOT, "modules", "models")
 
-# ✅ Load on GPU if available
-device = "cuda" if torch.cuda.is_available() else "mps"
+# ✅ The intent classification pipeline is loaded lazily by the model registry
 
-# ✅ Load the zero-shot classification model
-classifier = pipeline("text-classification", model="./modules/module2/intent_model", tokenizer="./modules/module2/intent_model", device=0)
+# ✅ Predicted {"label", "score"} per normalized query, shared by the app and evaluations
+intent_cache = LRUCache(max_size=4096)
+
+# ✅ Batch API: classifies many queries, running inference only on cache misses
+def detect_intents(queries, batch_size=32, with_scores=False):
+    keys = [normalize_query(q) for q in queries]
+    predictions = {}
+    pending = {}
+    for query, key in zip(queries, keys):
+        if key in predictions or key in pending:
+            continue
+        cached = intent_cache.lookup(key)
+        if cached is not None:
+            predictions[key] = cached
+        else:
+            pending[key] = query
+
+    if pending:
+        classifier = get_model("intent")
+        pending_keys = list(pending)
+        texts = list(pending.values())
+        # Sort by token length so each batch is padded only to similar-length queries
+        lengths = [len(ids) for ids in classifier.tokenizer(texts, truncation=True)["input_ids"]]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+        results = classifier([texts[i] for i in order], batch_size=batch_size, truncation=True)
+        for i, result in zip(order, results):
+            key = pending_keys[i]
+            prediction = {"label": result["label"], "score": float(result["score"])}
+            intent_cache.store(key, prediction)
+            predictions[key] = prediction
+
+    if with_scores:
+        return [predictions[key] for key in keys]
+    return [predictions[key]["label"] for key in keys]
 
 # ✅ Core function: detects intent from a single query
 def detect_intent(query: str) -> str:
-    result = classifier(query)
-    print(result)
-    result = result[0]
-    print("Predicted intent:", result["label"], "Score:", result["score"])
-    return result["label"]
+    return detect_intents([query])[0]
 
 # ✅ Optional: CLI usage for testing
 if __name__ == "__main__":
@@ -26,5 +53,5 @@ if __name__ == "__main__":
         user_input = input("🧠 Enter a query (or 'q' to quit): ")
         if user_input.lower() == "q":
             break
-        intent = detect_intent(user_input)
-        # print(f"🎯 Predicted intent: {intent}\n")
+        prediction = detect_intents([user_input], with_scores=True)[0]
+        print(f"🎯 Predicted intent: {prediction['label']} (score: {prediction['score']:.4f})\n")
@@ -0,0 +1,93 @@
+# modules/module2/intent_onnx.py
+
+import os
+import json
+import numpy as np
+from modules.module2.model_registry import INTENT_MODEL_DIR
+
+# === ONNX export of the fine-tuned intent classifier ===
+# CPU-only serving nodes run the exported graph with ONNX Runtime instead of
+# the PyTorch pipeline; the model registry picks this backend automatically
+# once the model has been exported with python -m modules.module2.intent_onnx.
+
+INTENT_ONNX_DIR = os.path.join(INTENT_MODEL_DIR, "onnx")
+INTENT_ONNX_PATH = os.path.join(INTENT_ONNX_DIR, "model.onnx")
+
+def export_intent_model(model_dir=INTENT_MODEL_DIR, out_dir=INTENT_ONNX_DIR, opset=17):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    print(f"📦 Exporting intent model from {model_dir} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+
+    sample = tokenizer(["Which labs work on robotics?"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            out_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+    tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "labels.json"), "w") as f:
+        json.dump({str(i): label for i, label in model.config.id2label.items()}, f, indent=2)
+    print(f"✅ ONNX intent model saved to: {out_path}")
+    return out_path
+
+class OnnxIntentClassifier:
+    # Mirrors the parts of the transformers text-classification pipeline that
+    # intent_classifier uses: called on a string or a list of strings, returns
+    # {"label", "score"} dicts, and exposes .tokenizer
+    def __init__(self, onnx_dir=INTENT_ONNX_DIR, num_threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(onnx_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        with open(os.path.join(onnx_dir, "labels.json")) as f:
+            self.id2label = {int(i): label for i, label in json.load(f).items()}
+
+    def __call__(self, texts, batch_size=32, truncation=True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+
+        results = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[i:i + batch_size], padding=True, truncation=truncation, return_tensors="np"
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(["logits"], feeds)[0]
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            best = probs.argmax(axis=1)
+            results.extend(
+                {"label": self.id2label[int(b)], "score": float(p[b])} for b, p in zip(best, probs)
+            )
+        return results
+
+def load_onnx_intent_classifier(onnx_dir=INTENT_ONNX_DIR):
+    path = os.path.join(onnx_dir, "model.onnx")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No ONNX intent model at {path}; export it with python -m modules.module2.intent_onnx")
+    return OnnxIntentClassifier(onnx_dir)
+
+if __name__ == "__main__":
+    export_intent_model()
@@ -0,0 +1,88 @@
+# modules/module2/intent_search.py
+
+from concurrent.futures import ThreadPoolExecutor
+from modules.module2.roberta_query import build_search_embedding
+from modules.module2.vector_store import get_vector_store
+
+# === Source preference per detected intent ===
+INTENT_PRIORITY = {
+    "Research": ["Research", "Highlights", "Professors", "Labs", "Institutes"],
+    "Professors": ["Professors", "Labs", "Research", "Highlights", "Institutes"],
+    "Labs": ["Labs", "Professors", "Research", "Highlights", "Institutes"],
+    "Institutes": ["Institutes", "Labs", "Professors", "Research", "Highlights"],
+    "Research_current_highlights": ["Research_current_highlights", "Research", "Professors", "Labs", "Institutes"],
+}
+
+# Priority names that are stored under a different "source" in research_index
+SOURCE_ALIASES = {"Highlights": "Research_current_highlights"}
+
+ALL_SOURCES = ["Labs", "Research", "Professors", "Institutes", "Research_current_highlights"]
+
+_executor = ThreadPoolExecutor(max_workers=len(ALL_SOURCES))
+
+def priority_sources(intent):
+    sources = []
+    for name in INTENT_PRIORITY.get(intent, []) + ALL_SOURCES:
+        source = SOURCE_ALIASES.get(name, name)
+        if source not in sources:
+            sources.append(source)
+    return sources
+
+def source_quotas(sources, top_k):
+    # Linearly decaying share of top_k by priority position (5, 4, 3, ... parts),
+    # rounded with largest remainders so the quotas sum to top_k
+    parts = list(range(len(sources), 0, -1))
+    exact = [top_k * p / sum(parts) for p in parts]
+    quotas = [int(q) for q in exact]
+    by_remainder = sorted(range(len(sources)), key=lambda i: (exact[i] - quotas[i], -i), reverse=True)
+    for i in by_remainder[:top_k - sum(quotas)]:
+        quotas[i] += 1
+    return dict(zip(sources, quotas))
+
+def query_source(query_embedding, source, n_results):
+    if n_results <= 0:
+        return []
+    try:
+        results = get_vector_store().query(query_embedding, n_results, where={"source": source})
+    except Exception as e:
+        print(f"⚠️ Filtered query for {source} failed: {e}")
+        return []
+    return list(zip(results["documents"][0], results["metadatas"][0], results["distances"][0]))
+
+def intent_filtered_search(query, intent, top_k=45, mode="reencode"):
+    query_embedding, expansion = build_search_embedding(query, mode)
+    query_embedding = query_embedding.tolist()
+
+    sources = priority_sources(intent)
+    quotas = source_quotas(sources, top_k)
+
+    # Each source is fetched up to twice its quota so that a source with too few
+    # matches can hand its unused slots to the next sources in priority order
+    futures = {
+        source: _executor.submit(query_source, query_embedding, source, min(top_k, 2 * quotas[source]))
+        for source in sources
+    }
+    hits = {source: future.result() for source, future in futures.items()}
+
+    selected = {source: hits[source][:quotas[source]] for source in sources}
+    spare = top_k - sum(len(items) for items in selected.values())
+    for source in sources:
+        if spare <= 0:
+            break
+        extra = hits[source][len(selected[source]):len(selected[source]) + spare]
+        selected[source].extend(extra)
+        spare -= len(extra)
+
+    # Ordered by source priority, then distance within each source
+    merged = [item for source in sources for item in sorted(selected[source], key=lambda x: x[2])]
+    return {
+        "documents": [[doc for doc, _, _ in merged]],
+        "metadatas": [[meta for _, meta, _ in merged]],
+        "distances": [[dist for _, _, dist in merged]],
+        "retriever": "intent",
+        "intent": intent,
+        "quotas": quotas,
+        "mode": mode,
+        "expanded_query": expansion["expanded_query"],
+        "expansion_terms": expansion["terms"]
+    }
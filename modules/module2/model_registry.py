@@ -0,0 +1,148 @@
+# modules/module2/model_registry.py
+
+import os
+import time
+import threading
+from functools import lru_cache
+
+# === Paths ===
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+CHROMA_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "chroma")
+INTENT_MODEL_DIR = "./modules/module2/intent_model"
+
+ROBERTA_MODEL_NAME = "sentence-transformers/all-roberta-large-v1"
+SPACY_MODEL_NAME = "en_core_web_lg"
+CROSS_ENCODER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# === Lazily initialised, process-wide models ===
+# Heavy libraries are imported inside the loaders so importing the query modules
+# stays cheap; each model is loaded once on first use and shared afterwards.
+_loaders = {}
+_instances = {}
+_load_times = {}
+_variants = {}
+_lock = threading.RLock()
+
+def register(name):
+    def wrap(loader):
+        _loaders[name] = loader
+        return loader
+    return wrap
+
+@lru_cache(maxsize=None)
+def get_device():
+    import torch
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+# Opt-in dynamic int8 quantization of the query encoder (CPU only). Index
+# building always uses the fp32 encoder so stored vectors are unaffected;
+# evaluations/quantization_guard.py reports the accuracy cost.
+ROBERTA_QUANTIZED = os.environ.get("ROBERTA_QUANTIZED", "0") == "1"
+
+@register("roberta_fp32")
+def _load_roberta_fp32():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(ROBERTA_MODEL_NAME).to(get_device())
+
+@register("roberta_int8")
+def _load_roberta_int8():
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(ROBERTA_MODEL_NAME, device="cpu")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+@register("roberta")
+def _load_roberta():
+    # Query-time encoder used by roberta_qe and roberta_query
+    variant = "roberta_int8" if ROBERTA_QUANTIZED else "roberta_fp32"
+    _variants["roberta"] = variant
+    return get_model(variant)
+
+@register("cross_encoder")
+def _load_cross_encoder():
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(CROSS_ENCODER_MODEL_NAME, device=get_device())
+
+@register("spacy")
+def _load_spacy():
+    import spacy
+    return spacy.load(SPACY_MODEL_NAME)
+
+# "auto" serves the intent model with ONNX Runtime when there is no GPU,
+# onnxruntime is installed and the model has been exported (python -m
+# modules.module2.intent_onnx), and with the PyTorch pipeline otherwise.
+# Serving never exports the model itself.
+INTENT_BACKEND = os.environ.get("INTENT_BACKEND", "auto")
+
+@register("intent")
+def _load_intent():
+    from modules.module2.intent_onnx import INTENT_ONNX_PATH, load_onnx_intent_classifier
+
+    backend = INTENT_BACKEND
+    if backend == "auto":
+        backend = "onnx" if get_device() == "cpu" and _onnxruntime_available() else "torch"
+        if backend == "onnx" and not os.path.exists(INTENT_ONNX_PATH):
+            print(f"⚠️ No ONNX intent model at {INTENT_ONNX_PATH}; using the PyTorch pipeline "
+                  "(export it with python -m modules.module2.intent_onnx)")
+            backend = "torch"
+    if backend == "onnx":
+        return load_onnx_intent_classifier()
+
+    from transformers import pipeline
+    return pipeline("text-classification", model=INTENT_MODEL_DIR, tokenizer=INTENT_MODEL_DIR, device=get_device())
+
+def _onnxruntime_available():
+    try:
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+@register("chroma")
+def _load_chroma():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_DIR)
+
+def get_model(name):
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        if name not in _instances:
+            if name not in _loaders:
+                raise KeyError(f"Unknown model '{name}', expected one of {sorted(_loaders)}")
+            print(f"⏳ Loading {name}...")
+            start = time.perf_counter()
+            _instances[name] = _loaders[name]()
+            _load_times[name] = time.perf_counter() - start
+            print(f"✅ Loaded {name} in {_load_times[name]:.2f}s")
+        return _instances[name]
+
+def get_chroma_client():
+    return get_model("chroma")
+
+def get_collection(name):
+    return get_chroma_client().get_or_create_collection(name)
+
+def use_model(name, variant):
+    # Point `name` at an already registered variant, e.g. use_model("roberta", "roberta_int8")
+    with _lock:
+        _instances[name] = get_model(variant)
+        _variants[name] = variant
+
+def active_variant(name):
+    # Registered model currently served under `name`, e.g. "roberta" -> "roberta_int8"
+    with _lock:
+        get_model(name)
+        return _variants.get(name, name)
+
+def is_loaded(name):
+    return name in _instances
+
+def load_times():
+    return {name: round(seconds, 3) for name, seconds in _load_times.items()}
@@ -3,6 +3,7 @@
 import os
 import chromadb
 from sentence_transformers import SentenceTransformer
+from modules.module2.model_registry import get_device
 import torch
 
 # === Universal path setup ===
@@ -13,10 +14,8 @@ CHROMA_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "chroma")
 client = chromadb.PersistentClient(path=CHROMA_DIR)
 collection = client.get_or_create_collection("sbert_documents")
 
-# MAC
-# device = "mps" if torch.backends.mps.is_available() else "cpu"
-# Windows
-device = "cuda" if torch.cuda.is_available() else "mps"
+# CUDA, then Apple MPS, then CPU
+device = get_device()
 print(f"🚀 Using device: {device}")
 
 # Use SBERT
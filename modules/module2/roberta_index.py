@@ -1,11 +1,15 @@
 # modules/index_creation.py
 
 import os
+import sys
+import json
+import time
+import argparse
+import hashlib
+from collections import Counter, deque
 import pandas as pd
-import torch
-import chromadb
-from sentence_transformers import SentenceTransformer
-import spacy
+from modules.module2.model_registry import get_chroma_client, get_device, get_model
+from modules.module2.vector_store import read_build_stamp, write_build_stamp
 
 # === Paths ===
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
@@ -37,23 +41,36 @@ def batch_upsert(collection, documents, embeddings, ids, metadatas, batch_size=5
             metadatas=metadatas[i:i+batch_size]
         )
 
-def build_indexes():
-    print("🚀 Building document and term indexes...")
+# === Content hashing for incremental rebuilds ===
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
-    device = "cuda" if torch.cuda.is_available() else "mps"
-    model = SentenceTransformer("sentence-transformers/all-roberta-large-v1").to(device)
-    nlp = spacy.load("en_core_web_lg")
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    client.delete_collection("research_index")
-    client.delete_collection("term_index")
-    doc_collection = client.get_or_create_collection("research_index")
-    term_collection = client.get_or_create_collection("term_index")
+def term_id(term):
+    # Stable id so incremental runs can upsert terms without renumbering
+    return "term_" + hashlib.sha1(term.encode("utf-8")).hexdigest()[:16]
 
-    all_texts = []
-    all_sources = []
-    all_ids = []
-    all_metadatas = []
+# Text that gets embedded for a CSV row; also used to match rows from other
+# retrievers (e.g. BM25 records) to research_index entries via content_hash
+def document_text(row, exclude=()):
+    parts = [
+        str(value).strip() for col, value in row.items()
+        if col not in EXCLUDE_COLS and col not in exclude and pd.notna(value)
+    ]
+    return " ".join(parts).strip()
+
+# Chroma ids are content-addressed ("<source>:<content_hash>", with a counter for
+# repeated texts). doc_ids are renumbered across all sources whenever a CSV
+# gains or loses rows, so keying on them made every later row look changed; a
+# content id only changes when the row's text does, and a shifted doc_id is just
+# a metadata update.
+def document_key(source, digest, seen):
+    key = f"{source}:{digest}"
+    seen[key] = seen.get(key, 0) + 1
+    return key if seen[key] == 1 else f"{key}:{seen[key]}"
 
+def iter_document_chunks(chunk_size=1000):
+    # Reads each source CSV in chunks of chunk_size rows and yields
+    # (texts, ids, metadatas) per chunk, so callers never hold the whole corpus
     doc_id_counter = 0  # Global doc_id
 
     print("📄 Processing data sources...")
@@ -63,54 +80,317 @@ def build_indexes():
             print(f"❌ File not found: {path}")
             continue
 
-        df = pd.read_csv(path)
-        print(f"✅ Loaded {source}: {len(df)} rows")
-
-        if "doc_id" not in df.columns:
-            df["doc_id"] = range(doc_id_counter, doc_id_counter + len(df))
-            doc_id_counter += len(df)
-        else:
-            # Ensure unique global doc_id
-            offset = doc_id_counter
-            df["doc_id"] = df["doc_id"].apply(lambda x: x + offset)
+        offset = doc_id_counter
+        num_rows = 0
+        seen = {}
+        for df in pd.read_csv(path, chunksize=chunk_size):
+            if "doc_id" not in df.columns:
+                df["doc_id"] = range(doc_id_counter, doc_id_counter + len(df))
+            else:
+                # Ensure unique global doc_id
+                df["doc_id"] = df["doc_id"].apply(lambda x: x + offset)
             doc_id_counter += len(df)
+            num_rows += len(df)
+
+            texts, ids, metadatas = [], [], []
+            for row in df.to_dict("records"):
+                combined_text = document_text(row)
+
+                if not combined_text:
+                    continue
+
+                digest = content_hash(combined_text)
+                texts.append(combined_text)
+                ids.append(document_key(source, digest, seen))
+                metadatas.append({
+                    "source": source,
+                    "doc_id": int(row["doc_id"]),
+                    "content_hash": digest
+                })
+            yield texts, ids, metadatas
+
+        print(f"✅ Loaded {source}: {num_rows} rows")
+
+def load_documents():
+    all_texts = []
+    all_ids = []
+    all_metadatas = []
+    for texts, ids, metadatas in iter_document_chunks():
+        all_texts.extend(texts)
+        all_ids.extend(ids)
+        all_metadatas.extend(metadatas)
+    return all_texts, all_ids, all_metadatas
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def get_stored_metadatas(collection):
+    stored = collection.get(include=["metadatas"])
+    return {doc_id: meta or {} for doc_id, meta in zip(stored["ids"], stored["metadatas"])}
+
+def get_reusable_embeddings(collection, wanted):
+    # wanted: {row index: stored id with the same content_hash}. Returns
+    # {row index: (embedding, stored metadata)} for ids that still hold that text
+    if not wanted:
+        return {}
+    found = collection.get(ids=sorted(set(wanted.values())), include=["embeddings", "metadatas"])
+    by_id = {
+        doc_id: ([float(x) for x in embedding], meta or {})
+        for doc_id, embedding, meta in zip(found["ids"], found["embeddings"], found["metadatas"])
+    }
+    return {i: by_id[doc_id] for i, doc_id in wanted.items() if doc_id in by_id}
+
+# === Per-document noun chunks ===
+# Each document's metadata keeps the ids of its normalised noun-chunk terms
+# ("term_ids", comma separated) so query expansion can pull candidate terms and
+# their vectors from term_index without re-parsing or re-encoding documents.
+# Ids of terms pruned by document frequency stay in the metadata but are simply
+# absent from term_index.
+TERM_ID_SEP = ","
+
+# noun_chunks needs the tagger/attribute_ruler (POS) and the parser; the
+# lemmatizer is kept for term normalisation
+NOUN_CHUNK_DISABLE = ("ner", "textcat")
+TERM_SKIP_POS = {"DET", "PRON"}
+
+def normalize_term(chunk):
+    # "the neural networks" -> "neural network"; determiner/pronoun-only chunks -> ""
+    tokens = [
+        token.lemma_.lower() for token in chunk
+        if token.pos_ not in TERM_SKIP_POS and not token.is_punct and not token.is_space
+    ]
+    term = " ".join(tokens).strip()
+    return term if len(term) > 1 and any(c.isalpha() for c in term) else ""
 
-        for _, row in df.iterrows():
-            parts = [
-                str(row[col]).strip() for col in df.columns
-                if col not in EXCLUDE_COLS and pd.notna(row[col])
-            ]
-            combined_text = " ".join(parts).strip()
+def doc_chunk_terms(doc):
+    return sorted({term for term in map(normalize_term, doc.noun_chunks) if term})
 
-            if not combined_text:
+def extract_doc_terms(nlp, rows, batch_size=64, n_process=1):
+    # rows: iterable of (text, context); yields (terms, context). A build runs a
+    # single nlp.pipe over all its rows, so with n_process > 1 (-1 = every core)
+    # the spaCy workers are started (and the model shipped to them) only once
+    disable = [name for name in NOUN_CHUNK_DISABLE if name in nlp.pipe_names]
+    docs = nlp.pipe(rows, as_tuples=True, batch_size=batch_size, n_process=n_process, disable=disable)
+    num_docs = num_terms = 0
+    elapsed = 0.0
+    while True:
+        start = time.perf_counter()
+        try:
+            doc, context = next(docs)
+        except StopIteration:
+            break
+        terms = doc_chunk_terms(doc)
+        elapsed += time.perf_counter() - start
+        num_docs += 1
+        num_terms += len(terms)
+        yield terms, context
+
+    if num_docs:
+        print(f"🧩 Extracted {num_terms} terms from {num_docs} documents in {elapsed:.2f}s "
+              f"({num_terms / max(elapsed, 1e-9):.0f} terms/s, n_process={n_process})")
+
+# === Term vocabulary and document-frequency stats ===
+# term_id -> term for every term seen so far, plus the document frequencies from
+# the last build; lets incremental builds re-apply the DF thresholds to terms of
+# unchanged documents without re-parsing them
+TERM_STATS_PATH = os.path.join(PROJECT_ROOT, "vectorstore", "term_stats.json")
+
+def load_term_vocab(path=TERM_STATS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {tid: entry["term"] for tid, entry in json.load(f)["terms"].items()}
+
+def save_term_stats(vocab, doc_freq, num_docs, min_df, max_df, path=TERM_STATS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "num_docs": num_docs,
+            "min_df": min_df,
+            "max_df": max_df,
+            "terms": {tid: {"term": term, "df": doc_freq.get(tid, 0)} for tid, term in vocab.items()}
+        }, f)
+
+def df_filter(doc_freq, num_docs, min_df=2, max_df=0.5):
+    # min_df is an absolute document count, max_df a fraction of the corpus
+    max_count = max_df * num_docs
+    return {tid for tid, df in doc_freq.items() if min_df <= df <= max_count}
+
+def sync_term_index(term_collection, model, device, vocab, keep_ids, batch_size=1000):
+    stored = set(term_collection.get(include=[])["ids"])
+    stale = list(stored - keep_ids)
+    missing = [tid for tid in keep_ids - stored if tid in vocab]
+    unknown = len(keep_ids - stored) - len(missing)
+    if unknown:
+        print(f"⚠️ {unknown} terms have no stored text; run with --full to rebuild the vocabulary")
+
+    if stale:
+        print(f"🗑️ Pruning {len(stale)} terms from term index...")
+        for i in range(0, len(stale), 5000):
+            term_collection.delete(ids=stale[i:i+5000])
+
+    if missing:
+        print(f"🔁 Storing {len(missing)} terms in term index...")
+        for i in range(0, len(missing), batch_size):
+            batch_ids = missing[i:i+batch_size]
+            terms = [vocab[tid] for tid in batch_ids]
+            embeddings = model.encode(terms, convert_to_numpy=True, device=device)
+            batch_upsert(term_collection, terms, embeddings.tolist(), batch_ids, [{"term": t} for t in terms])
+    return len(stale), len(missing)
+
+def build_indexes(full_rebuild=False, chunk_size=1000, n_process=1, min_df=2, max_df=0.5):
+    mode = "full rebuild" if full_rebuild else "incremental"
+    print(f"🚀 Building document and term indexes ({mode}, {chunk_size} rows per chunk)...")
+
+    device = get_device()
+    model = get_model("roberta_fp32")
+    nlp = get_model("spacy")
+    client = get_chroma_client()
+    if full_rebuild:
+        for name in ("research_index", "term_index"):
+            try:
+                client.delete_collection(name)
+            except Exception:
+                pass
+    doc_collection = client.get_or_create_collection("research_index")
+    term_collection = client.get_or_create_collection("term_index")
+
+    # Only ids, content hashes and term ids are kept across chunks; texts and
+    # embeddings are released once their chunk has been upserted
+    stored = {} if full_rebuild else get_stored_metadatas(doc_collection)
+    stored_by_hash = {}
+    for doc_id, meta in stored.items():
+        stored_by_hash.setdefault(meta.get("content_hash"), doc_id)
+    vocab = {} if full_rebuild else load_term_vocab()
+    doc_freq = Counter()
+    current_ids = set()
+    counts = Counter()
+    # Diffed chunks waiting for their rows' terms, in CSV order
+    pending = deque()
+
+    def rows_to_parse():
+        # Diffs each chunk against what is already stored and yields the rows
+        # that need noun-chunk terms, keyed by (chunk, row index)
+        for texts, ids, metadatas in iter_document_chunks(chunk_size):
+            current_ids.update(ids)
+
+            # === Diff against what is already stored ===
+            changed, moved = [], []
+            for i, (doc_id, meta) in enumerate(zip(ids, metadatas)):
+                stored_meta = stored.get(doc_id)
+                if stored_meta is None:
+                    changed.append(i)
+                    continue
+                doc_freq.update(t for t in stored_meta.get("term_ids", "").split(TERM_ID_SEP) if t)
+                if stored_meta.get("doc_id") != meta["doc_id"]:
+                    # Same text, renumbered row: refresh the metadata only
+                    if "term_ids" in stored_meta:
+                        meta["term_ids"] = stored_meta["term_ids"]
+                    moved.append(i)
+            if moved:
+                counts["moved"] += len(moved)
+                doc_collection.update(ids=[ids[i] for i in moved], metadatas=[metadatas[i] for i in moved])
+            if not changed:
                 continue
+            counts["changed"] += len(changed)
+
+            # Text already stored under another id (e.g. an id from before content
+            # addressing): reuse its embedding and terms instead of encoding again
+            reused = get_reusable_embeddings(doc_collection, {
+                i: stored_by_hash[metadatas[i]["content_hash"]]
+                for i in changed if metadatas[i]["content_hash"] in stored_by_hash
+            })
+            counts["reused"] += len(reused)
+            for i, (_, stored_meta) in reused.items():
+                if "term_ids" in stored_meta:
+                    metadatas[i]["term_ids"] = stored_meta["term_ids"]
+                    doc_freq.update(t for t in stored_meta["term_ids"].split(TERM_ID_SEP) if t)
+
+            to_parse = [i for i in changed if "term_ids" not in metadatas[i]]
+            chunk = {"texts": texts, "ids": ids, "metadatas": metadatas, "changed": changed,
+                     "reused": reused, "unparsed": len(to_parse)}
+            pending.append(chunk)
+            for i in to_parse:
+                yield texts[i], (chunk, i)
+
+    def store_chunk(chunk):
+        texts, ids, metadatas, changed, reused = (
+            chunk[key] for key in ("texts", "ids", "metadatas", "changed", "reused")
+        )
+        vectors = {i: embedding for i, (embedding, _) in reused.items()}
+        to_encode = [i for i in changed if i not in reused]
+        if to_encode:
+            print(f"🧠 Embedding {len(to_encode)} documents...")
+            embeddings = model.encode([texts[i] for i in to_encode], convert_to_numpy=True, device=device)
+            vectors.update(zip(to_encode, embeddings.tolist()))
+        batch_upsert(
+            doc_collection,
+            [texts[i] for i in changed],
+            [vectors[i] for i in changed],
+            [ids[i] for i in changed],
+            [metadatas[i] for i in changed]
+        )
+
+    def store_ready_chunks():
+        while pending and pending[0]["unparsed"] == 0:
+            store_chunk(pending.popleft())
 
-            all_texts.append(combined_text)
-            all_sources.append(source)
-            all_ids.append(str(row["doc_id"]))
-            all_metadatas.append({"source": source, "doc_id": row["doc_id"]})
+    # Terms for every changed row come from one nlp.pipe; a chunk is embedded
+    # and upserted as soon as all of its rows have their terms
+    for terms, (chunk, i) in extract_doc_terms(nlp, rows_to_parse(), n_process=n_process):
+        tids = [term_id(t) for t in terms]
+        vocab.update(zip(tids, terms))
+        doc_freq.update(tids)
+        chunk["metadatas"][i]["term_ids"] = TERM_ID_SEP.join(tids)
+        chunk["unparsed"] -= 1
+        store_ready_chunks()
+    store_ready_chunks()
+    num_changed = counts["changed"]
 
-    print(f"🧠 Embedding {len(all_texts)} documents...")
-    embeddings = model.encode(all_texts, convert_to_numpy=True, device=device)
+    removed_ids = [doc_id for doc_id in stored if doc_id not in current_ids]
+    if removed_ids:
+        print(f"🗑️ Deleting {len(removed_ids)} stale documents...")
+        for i in range(0, len(removed_ids), 5000):
+            doc_collection.delete(ids=removed_ids[i:i+5000])
 
-    print(f"📦 Storing documents in vector DB...")
-    batch_upsert(doc_collection, all_texts, embeddings.tolist(), all_ids, all_metadatas)
+    print(f"🔍 {num_changed} new/changed ({counts['reused']} reused a stored embedding), {len(removed_ids)} removed, "
+          f"{len(current_ids) - num_changed} unchanged ({counts['moved']} renumbered) documents")
+    # Derived indexes (FAISS) compare this stamp to tell whether they are stale
+    if full_rebuild or num_changed or counts["moved"] or removed_ids or read_build_stamp() is None:
+        write_build_stamp(len(current_ids))
 
     # === Term Indexing ===
-    print("🧩 Extracting and indexing terms...")
-    term_set = set()
-    for text in all_texts:
-        doc = nlp(text)
-        term_set.update(chunk.text.lower().strip() for chunk in doc.noun_chunks if chunk.text.strip())
-
-    terms = list(term_set)
-    term_ids = [f"term_{i}" for i in range(len(terms))]
-    term_embeddings = model.encode(terms, convert_to_numpy=True, device=device)
-    term_metadatas = [{"term": t} for t in terms]
-    print(f"🔁 Storing {len(terms)} terms in term index...")
-    batch_upsert(term_collection, terms, term_embeddings.tolist(), term_ids, term_metadatas)
+    # term_index holds only terms within the DF thresholds; existing terms keep their vectors
+    keep_ids = df_filter(doc_freq, len(current_ids), min_df, max_df)
+    print(f"🧩 Keeping {len(keep_ids)} of {len(doc_freq)} terms (min_df={min_df}, max_df={max_df})")
+    num_pruned, num_added = sync_term_index(term_collection, model, device, vocab, keep_ids, chunk_size)
+    vocab = {tid: term for tid, term in vocab.items() if tid in doc_freq}
+    save_term_stats(vocab, doc_freq, len(current_ids), min_df, max_df)
+    print(f"🧩 Term index: {term_collection.count()} terms ({num_added} added, {num_pruned} pruned)")
 
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"📈 Peak RSS: {peak:.1f} MB")
     print("✅ Indexing complete.")
 
 if __name__ == '__main__':
-    build_indexes()
+    parser = argparse.ArgumentParser(description="Build the RoBERTa document and term indexes.")
+    parser.add_argument("--full", action="store_true",
+                        help="drop both collections and re-embed everything instead of an incremental update")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="CSV rows read, embedded and upserted at a time; bounds peak memory")
+    parser.add_argument("--n-process", type=int, default=1,
+                        help="spaCy worker processes for term extraction (-1 for all cores)")
+    parser.add_argument("--min-df", type=int, default=2,
+                        help="drop terms found in fewer documents than this")
+    parser.add_argument("--max-df", type=float, default=0.5,
+                        help="drop terms found in more than this fraction of documents")
+    args = parser.parse_args()
+    build_indexes(full_rebuild=args.full, chunk_size=args.chunk_size, n_process=args.n_process,
+                  min_df=args.min_df, max_df=args.max_df)
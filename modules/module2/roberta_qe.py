@@ -1,48 +1,48 @@
 # modules/query_expansion.py
 
-import os
-import torch
-import chromadb
-import spacy
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
+from modules.module2.embedding_cache import encode_query
+from modules.module2.model_registry import get_collection, get_model
+from modules.module2.roberta_index import TERM_ID_SEP, doc_chunk_terms
+from modules.module2.vector_store import get_vector_store
 
-# === Paths ===
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-CHROMA_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "chroma")
-
-# Load NLP & Model
-nlp = spacy.load("en_core_web_lg")
-device = "cuda" if torch.cuda.is_available() else "mps"
-model = SentenceTransformer("sentence-transformers/all-roberta-large-v1").to(device)
-
-# Connect to ChromaDB
-client = chromadb.PersistentClient(path=CHROMA_DIR)
-doc_collection = client.get_or_create_collection("research_index")
-term_collection = client.get_or_create_collection("term_index")
+# Models and Chroma collections come from the shared registry and load on first use
 
 # === spaCy tokenizer ===
+# Tokenizer only: is_punct and is_space are lexical, so the tagger, parser and
+# NER of the full pipeline would run for nothing
 def tokenize(text):
-    return [token.text.lower() for token in nlp(text) if not token.is_punct and not token.is_space]
+    nlp = get_model("spacy")
+    return [token.text.lower() for token in nlp.tokenizer(text) if not token.is_punct and not token.is_space]
 
-def expand_query(query, doc_top_k=5, term_top_k=5, max_final_expansions=5):
+def expand_query_with_embeddings(query, doc_top_k=5, term_top_k=5, max_final_expansions=5):
     print(f"\n🔍 Expanding query: {query}")
-    query_embedding = model.encode(query, convert_to_numpy=True, device=device)
+    model = get_model("roberta")
+    term_collection = get_collection("term_index")
+    query_embedding = encode_query("roberta", query)
     query_tokens = set(tokenize(query))
 
     # === STEP 1: Retrieve top documents ===
-    doc_results = doc_collection.query(
-        query_embeddings=[query_embedding],
-        n_results=doc_top_k,
-        include=["documents"]
-    )
+    doc_results = get_vector_store().query(query_embedding, doc_top_k)
     # print(f"Doc results: {doc_results["documents"][0]}")
-    # Extract candidate terms from document text
-    candidate_terms = set()
-    for doc in doc_results["documents"][0]:
-        if doc.strip():
-            parsed = nlp(doc)
-            candidate_terms.update(chunk.text.lower().strip() for chunk in parsed.noun_chunks)
+    # Candidate terms come from the per-document term table built at index time;
+    # documents indexed before it existed fall back to parsing the text
+    term_vectors = {}
+    stored_term_ids = set()
+    parsed_terms = set()
+    for doc, meta in zip(doc_results["documents"][0], doc_results["metadatas"][0]):
+        term_ids = (meta or {}).get("term_ids")
+        if term_ids is not None:
+            stored_term_ids.update(t for t in term_ids.split(TERM_ID_SEP) if t)
+        elif doc.strip():
+            parsed = get_model("spacy")(doc)
+            parsed_terms.update(doc_chunk_terms(parsed))
+
+    if stored_term_ids:
+        stored = term_collection.get(ids=list(stored_term_ids), include=["documents", "embeddings"])
+        term_vectors.update(zip(stored["documents"], stored["embeddings"]))
+    candidate_terms = parsed_terms | set(term_vectors)
 
     # === STEP 2: Remove terms found in original query ===
     filtered_candidates = [
@@ -58,26 +58,50 @@ def expand_query(query, doc_top_k=5, term_top_k=5, max_final_expansions=5):
     term_results = term_collection.query(
         query_embeddings=[query_embedding],
         n_results=term_top_k,
-        include=["documents"]
+        include=["documents", "embeddings"]
     )
     term_expansions = term_results["documents"][0]
+    term_vectors.update(zip(term_expansions, term_results["embeddings"][0]))
 
     # === STEP 4: Combine & deduplicate terms ===
     combined_terms = list(set(term_expansions + filtered_candidates))
 
     if not combined_terms:
         print("⚠️ No expansion terms found.")
-        return query, []
+        return {
+            "expanded_query": query,
+            "terms": [],
+            "query_embedding": query_embedding,
+            "term_embeddings": np.empty((0, len(query_embedding)), dtype=query_embedding.dtype),
+            "similarities": np.empty(0, dtype=np.float32)
+        }
 
     # === STEP 5: Embed and rank final terms ===
-    term_embeddings = model.encode(combined_terms, convert_to_numpy=True, device=device)
+    # Only terms without a stored vector (legacy fallback) go through the encoder
+    missing = [t for t in combined_terms if t not in term_vectors]
+    if missing:
+        encoded = model.encode(missing, convert_to_numpy=True)
+        term_vectors.update(zip(missing, encoded))
+    term_embeddings = np.asarray([term_vectors[t] for t in combined_terms], dtype=np.float32)
     similarities = cosine_similarity([query_embedding], term_embeddings)[0]
     top_indices = similarities.argsort()[-max_final_expansions:][::-1]
     final_expansions = [combined_terms[i] for i in top_indices]
 
     # === Final expanded query ===
+    # Embeddings are returned alongside the text so callers can build the
+    # expanded-query vector without another encoder pass
     expanded_query = query + " " + " ".join(final_expansions)
-    return expanded_query, final_expansions
+    return {
+        "expanded_query": expanded_query,
+        "terms": final_expansions,
+        "query_embedding": query_embedding,
+        "term_embeddings": term_embeddings[top_indices],
+        "similarities": similarities[top_indices]
+    }
+
+def expand_query(query, doc_top_k=5, term_top_k=5, max_final_expansions=5):
+    expansion = expand_query_with_embeddings(query, doc_top_k, term_top_k, max_final_expansions)
+    return expansion["expanded_query"], expansion["terms"]
 
 # === CLI Test ===
 if __name__ == '__main__':
@@ -1,25 +1,16 @@
 # modules/query_and_search.py
 
-import os
-import torch
-import chromadb
-from sentence_transformers import SentenceTransformer
-from modules.module2.roberta_qe import expand_query
+import numpy as np
+from modules.module2.roberta_qe import expand_query, expand_query_with_embeddings
 from modules.module2.intent_classifier import detect_intent
+from modules.module2.embedding_cache import encode_query, query_embedding_cache
+from modules.module2.model_registry import load_times
+from modules.module2.vector_store import get_vector_store
 # from roberta_qe import expand_query
 # from intent_classifier import detect_intent
 
-# === Paths ===
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-CHROMA_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "chroma")
-
-# === Setup ===
-device = "cuda" if torch.cuda.is_available() else "mps"
-model = SentenceTransformer("sentence-transformers/all-roberta-large-v1").to(device)
-
-# === ChromaDB client & collection ===
-client = chromadb.PersistentClient(path=CHROMA_DIR)
-doc_collection = client.get_or_create_collection("research_index")
+# The RoBERTa encoder is shared with roberta_qe through the model registry; research_index
+# is queried through the configured vector store (Chroma or FAISS, see vector_store.py)
 
 def search_expanded_query(query, top_k=15):
     # Step 1: Expand the query
@@ -31,15 +22,58 @@ def search_expanded_query(query, top_k=15):
     # print(f"Terms    : {expansion_terms}")
 
     # Step 2: Embed the expanded query
-    query_embedding = model.encode(expanded_query, convert_to_numpy=True, device=device)
+    query_embedding = encode_query("roberta", expanded_query)
 
     # Step 3: Query the vector index
-    results = doc_collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k,
-        include=["documents", "metadatas", "distances"]
-    )
+    results = get_vector_store().query(query_embedding, top_k)
+
+    return results
+
+# === Fused expand-then-search ===
+# "centroid": build the expanded-query vector from the query and term embeddings
+#             already computed during expansion (no extra encoder pass)
+# "reencode": embed the concatenated expanded query string (same as search_expanded_query)
+SEARCH_MODES = ("centroid", "reencode")
+
+def expanded_query_centroid(query_embedding, term_embeddings, similarities, query_weight=0.6):
+    query_vec = query_embedding / (np.linalg.norm(query_embedding) or 1.0)
+    if len(term_embeddings) == 0:
+        return query_vec
+
+    weights = np.clip(similarities, 0.0, None)
+    if weights.sum() == 0:
+        weights = np.ones(len(term_embeddings))
+    norms = np.linalg.norm(term_embeddings, axis=1, keepdims=True)
+    term_vecs = term_embeddings / np.where(norms == 0, 1.0, norms)
+    term_centroid = (weights[:, None] * term_vecs).sum(axis=0) / weights.sum()
+
+    fused = query_weight * query_vec + (1 - query_weight) * term_centroid
+    return fused / (np.linalg.norm(fused) or 1.0)
+
+def build_search_embedding(query, mode="reencode", query_weight=0.6):
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+
+    expansion = expand_query_with_embeddings(query)
+
+    if mode == "centroid":
+        query_embedding = expanded_query_centroid(
+            expansion["query_embedding"],
+            expansion["term_embeddings"],
+            expansion["similarities"],
+            query_weight=query_weight
+        )
+    else:
+        query_embedding = encode_query("roberta", expansion["expanded_query"])
+    return query_embedding, expansion
+
+def search_fused(query, top_k=15, mode="reencode", query_weight=0.6):
+    query_embedding, expansion = build_search_embedding(query, mode, query_weight)
 
+    results = get_vector_store().query(query_embedding, top_k)
+    results["mode"] = mode
+    results["expanded_query"] = expansion["expanded_query"]
+    results["expansion_terms"] = expansion["terms"]
     return results
 
 def print_ranked_results(results,preferred_type=None):
@@ -77,3 +111,5 @@ if __name__ == '__main__':
         preferred_type = detect_intent(query)
         # print(f"Intent: {preferred_type}")
         print_ranked_results(results,preferred_type)
+        print(f"🗃️ Query embedding cache: {query_embedding_cache.stats()}")
+        print(f"⏱️ Model load times (s): {load_times()}")
@@ -3,6 +3,7 @@ import pandas as pd
 import torch
 import chromadb
 from sentence_transformers import SentenceTransformer
+from modules.module2.model_registry import get_device
 
 # === Universal path resolver ===
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
@@ -12,10 +13,8 @@ CHROMA_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "chroma")
 def data_path(filename):
     return os.path.join(DATA_DIR, filename)
 
-# MAC
-# device = "mps" if torch.backends.mps.is_available() else "cpu"
-# Windows
-device = "cuda" if torch.cuda.is_available() else "mps"
+# CUDA, then Apple MPS, then CPU
+device = get_device()
 print(f"🚀 Using device: {device}")
 
 # Fix Keras/TF issue
@@ -38,8 +37,30 @@ datasources = {
     "Research_current_highlights": data_path("current_research_highlights.csv")
 }
 
-def build_vector_db():
-    print("🔧 Building SBERT-based vector DB...")
+EXCLUDE_COLS = {"doc_id", "link", "url", "Publication Link", "Profile URL", "href"}
+
+# === Row -> (id, content, metadata) ===
+def iter_documents(name, df):
+    text_cols = [col for col in df.columns if col not in EXCLUDE_COLS]
+    for row in df.to_dict("records"):
+        content = "\n".join(str(row[col]) for col in text_cols).strip()
+        if not content:
+            continue
+        yield f"{name}_{row['doc_id']}", content, {"source": name, "doc_id": row["doc_id"]}
+
+# === Fixed-size batches from a generator ===
+def iter_batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def build_vector_db(batch_size=64):
+    print(f"🔧 Building SBERT-based vector DB (batch_size={batch_size})...")
     doc_counter = 0
 
     for name, path in datasources.items():
@@ -54,29 +75,24 @@ def build_vector_db():
             doc_counter += len(df)
             df.to_csv(path, index=False)
 
-        print(f"Indexing datasource: {name}")
-        for i, row in df.iterrows():
-            print(f"  → Indexing doc {i}")
-            doc_id = f"{name}_{row['doc_id']}"
-            print(df.columns)
-            text_parts = [str(row[col]) for col in df.columns
-                          if col not in ["doc_id", "link", "url", "Publication Link", "Profile URL", "href"]]
-
-            content = "\n".join(text_parts).strip()
-            if not content:
-                continue
-
+        print(f"Indexing datasource: {name} ({len(df)} rows)")
+        indexed = 0
+        for batch_no, batch in enumerate(iter_batches(iter_documents(name, df), batch_size), 1):
+            ids, contents, metadatas = (list(col) for col in zip(*batch))
             try:
-                embedding = sbert_model.encode(content, convert_to_numpy=True, device=device)
-
-                collection.add(
-                    documents=[content],
-                    ids=[doc_id],
-                    metadatas=[{"source": name, "doc_id": row["doc_id"]}],
-                    embeddings=[embedding]
+                embeddings = sbert_model.encode(
+                    contents, batch_size=batch_size, convert_to_numpy=True, device=device
+                )
+                collection.upsert(
+                    documents=contents,
+                    ids=ids,
+                    metadatas=metadatas,
+                    embeddings=embeddings.tolist()
                 )
+                indexed += len(ids)
+                print(f"  → Batch {batch_no}: {indexed}/{len(df)} docs indexed")
             except Exception as e:
-                print(f"⚠️ Failed to embed doc {doc_id}: {e}")
+                print(f"⚠️ Failed to embed batch {batch_no} ({ids[0]} .. {ids[-1]}): {e}")
 
     print("✅ SBERT Vector DB built.")
 
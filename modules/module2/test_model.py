@@ -10,7 +10,7 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "modules", "data")
 CHROMA_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "chroma")
 MODELS_DIR = os.path.join(PROJECT_ROOT, "modules", "models")
 
-device = "cuda" if torch.cuda.is_available() else "mps"
+device = "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
 # Load your fine-tuned intent classifier
 classifier = pipeline(
     "text-classification",
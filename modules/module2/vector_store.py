@@ -0,0 +1,330 @@
+# modules/module2/vector_store.py
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import numpy as np
+from modules.module2.model_registry import PROJECT_ROOT, get_collection
+
+# === Pluggable vector store for research_index ===
+# Retrieval code calls get_vector_store().query(...) and gets a Chroma-shaped
+# result back, whichever backend is configured:
+#   VECTOR_BACKEND=chroma  (default) query the Chroma collection directly
+#   VECTOR_BACKEND=faiss   query a local FAISS index built from the same embeddings,
+#                          memory-mapped from disk, with doc text/metadata in a side table
+# research_index is updated incrementally. Every build that changes it writes a
+# build stamp next to the collection; a FAISS index copies the stamp it was
+# built from and compares it on load, which is one small file read and needs
+# no Chroma. FAISS_FULL_CHECK=1 additionally compares the document count and a
+# fingerprint of (id, content_hash) pairs against the collection, which pages
+# through all of its metadata. FAISS_ON_STALE=warn (default) prints a warning
+# for a stale index, "error" refuses to serve it, "ignore" skips the check.
+
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")
+FAISS_ON_STALE = os.environ.get("FAISS_ON_STALE", "warn")
+FAISS_FULL_CHECK = os.environ.get("FAISS_FULL_CHECK", "0") == "1"
+FAISS_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "faiss")
+FAISS_INDEX_TYPES = ("flat", "ivf", "hnsw")
+BUILD_STAMP_PATH = os.path.join(PROJECT_ROOT, "vectorstore", "research_index_build.json")
+
+def write_build_stamp(count, path=None):
+    path = path or BUILD_STAMP_PATH
+    stamp = {"build_id": uuid.uuid4().hex, "count": count, "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(stamp, f)
+    return stamp
+
+def read_build_stamp(path=None):
+    path = path or BUILD_STAMP_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+class ChromaVectorStore:
+    def __init__(self, collection_name="research_index"):
+        self.collection_name = collection_name
+
+    def query(self, embedding, top_k, where=None):
+        kwargs = {"where": where} if where else {}
+        return get_collection(self.collection_name).query(
+            query_embeddings=[np.asarray(embedding).tolist()],
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"],
+            **kwargs
+        )
+
+    def metadatas_by_hash(self, hashes):
+        stored = get_collection(self.collection_name).get(
+            where={"content_hash": {"$in": list(hashes)}}, include=["metadatas"]
+        )
+        return {meta["content_hash"]: meta for meta in stored["metadatas"]}
+
+class StaleIndexError(RuntimeError):
+    pass
+
+class FaissVectorStore:
+    def __init__(self, index_dir=FAISS_DIR, nprobe=16, ef_search=64, on_stale=FAISS_ON_STALE,
+                 full_check=FAISS_FULL_CHECK):
+        import faiss
+
+        path = os.path.join(index_dir, "index.faiss")
+        try:
+            self.index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Not every index type supports mmap; fall back to a regular load
+            self.index = faiss.read_index(path)
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = nprobe
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = ef_search
+
+        with open(os.path.join(index_dir, "docs.json")) as f:
+            side_table = json.load(f)
+        self.ids = side_table["ids"]
+        self.documents = side_table["documents"]
+        self.metadatas = side_table["metadatas"]
+        self.index_dir = index_dir
+        self.source_count = side_table.get("source_count")
+        self.fingerprint = side_table.get("fingerprint")
+        self.build_stamp = side_table.get("build_stamp")
+        self._by_hash = None
+        if on_stale != "ignore":
+            self.check_fresh(on_stale, full_check)
+
+    def check_fresh(self, on_stale="warn", full_check=False, collection_name="research_index"):
+        stamp = read_build_stamp()
+        if self.build_stamp is None:
+            problem = f"was built without a {collection_name} build stamp"
+        elif stamp is None:
+            problem = f"has no {collection_name} build stamp to compare against"
+        elif stamp["build_id"] != self.build_stamp["build_id"]:
+            problem = (f"was built from the {collection_name} build of {self.build_stamp['built_at']}, "
+                       f"the latest is from {stamp['built_at']}")
+        elif not full_check:
+            return True
+        else:
+            count = get_collection(collection_name).count()
+            if count != self.source_count:
+                problem = f"was built from {self.source_count} documents, {collection_name} now has {count}"
+            elif collection_fingerprint(collection_name) != self.fingerprint:
+                problem = f"no longer matches the documents in {collection_name}"
+            else:
+                return True
+
+        message = f"FAISS index at {self.index_dir} {problem}; rebuild it with python -m modules.module2.vector_store"
+        if on_stale == "error":
+            raise StaleIndexError(message)
+        print(f"⚠️ {message}")
+        return False
+
+    def _search(self, embedding, k):
+        # Never normalise in place: callers pass shared (read-only) cached embeddings
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        query = query / (np.linalg.norm(query) or 1.0)
+        sims, rows = self.index.search(query, k)
+        return [(int(r), float(s)) for r, s in zip(rows[0], sims[0]) if r >= 0]
+
+    def query(self, embedding, top_k, where=None):
+        k = min(top_k, self.index.ntotal)
+        hits = self._search(embedding, k)
+        if where:
+            # Metadata filters are applied after the ANN search; widen the
+            # candidate pool until enough rows match or the index is exhausted
+            matches = lambda row: all(self.metadatas[row].get(key) == value for key, value in where.items())
+            while True:
+                filtered = [(r, s) for r, s in hits if matches(r)]
+                if len(filtered) >= top_k or k >= self.index.ntotal:
+                    break
+                k = min(k * 4, self.index.ntotal)
+                hits = self._search(embedding, k)
+            hits = filtered[:top_k]
+
+        # Vectors are unit length, so squared L2 (Chroma's default metric) is 2 - 2 * cosine
+        return {
+            "ids": [[self.ids[r] for r, _ in hits]],
+            "documents": [[self.documents[r] for r, _ in hits]],
+            "metadatas": [[self.metadatas[r] for r, _ in hits]],
+            "distances": [[max(0.0, 2 - 2 * s) for _, s in hits]]
+        }
+
+    def metadatas_by_hash(self, hashes):
+        if self._by_hash is None:
+            self._by_hash = {meta.get("content_hash"): meta for meta in self.metadatas}
+        return {h: self._by_hash[h] for h in hashes if h in self._by_hash}
+
+# === Build a FAISS index from research_index ===
+def iter_collection_pages(collection_name="research_index", page_size=5000, include=("documents", "metadatas", "embeddings")):
+    collection = get_collection(collection_name)
+    total = collection.count()
+    for offset in range(0, total, page_size):
+        yield collection.get(include=list(include), limit=page_size, offset=offset)
+
+def index_fingerprint(ids, metadatas):
+    digest = hashlib.sha1()
+    for doc_id, meta in sorted(zip(ids, metadatas), key=lambda pair: pair[0]):
+        digest.update(f"{doc_id}\t{(meta or {}).get('content_hash', '')}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def collection_fingerprint(collection_name="research_index", page_size=5000):
+    ids, metadatas = [], []
+    for page in iter_collection_pages(collection_name, page_size, include=("metadatas",)):
+        ids.extend(page["ids"])
+        metadatas.extend(page["metadatas"])
+    return index_fingerprint(ids, metadatas)
+
+def export_collection(collection_name="research_index", page_size=5000):
+    ids, documents, metadatas, embeddings = [], [], [], []
+    for page in iter_collection_pages(collection_name, page_size):
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        embeddings.append(np.asarray(page["embeddings"], dtype=np.float32))
+    matrix = np.vstack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+    return ids, documents, metadatas, matrix
+
+def build_faiss_index(index_type="flat", index_dir=FAISS_DIR, nlist=None, hnsw_m=32):
+    import faiss
+
+    if index_type not in FAISS_INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {FAISS_INDEX_TYPES}")
+
+    print(f"🔧 Building FAISS ({index_type}) index from research_index...")
+    # Read before exporting: a build that lands mid-export then shows up as stale
+    build_stamp = read_build_stamp()
+    ids, documents, metadatas, matrix = export_collection()
+    if not len(matrix):
+        print("❌ research_index is empty, nothing to build.")
+        return None
+    faiss.normalize_L2(matrix)
+    dim = matrix.shape[1]
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "ivf":
+        nlist = nlist or max(1, int(4 * np.sqrt(len(matrix))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(matrix)
+    else:
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+    index.add(matrix)
+
+    os.makedirs(index_dir, exist_ok=True)
+    faiss.write_index(index, os.path.join(index_dir, "index.faiss"))
+    with open(os.path.join(index_dir, "docs.json"), "w") as f:
+        json.dump({
+            "index_type": index_type,
+            "source_count": len(ids),
+            "fingerprint": index_fingerprint(ids, metadatas),
+            "build_stamp": build_stamp,
+            "ids": ids,
+            "documents": documents,
+            "metadatas": metadatas
+        }, f)
+    print(f"✅ FAISS index with {index.ntotal} vectors saved to: {index_dir}")
+    return index
+
+# === Memory-mapped float16 embedding matrix ===
+# Offline jobs (evaluation, test-collection building, dedup analysis) load the
+# corpus as one (num_docs, dim) unit-normalised float16 matrix plus an aligned
+# row table (doc_id, source, content_hash), so similarity over every document
+# is a single matrix multiply
+EMBEDDINGS_DIR = os.path.join(PROJECT_ROOT, "vectorstore", "embeddings")
+MATRIX_FILE = "research_index_f16.npy"
+ROWS_FILE = "research_index_rows.npy"
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def export_embedding_matrix(out_dir=EMBEDDINGS_DIR, collection_name="research_index", page_size=5000):
+    print(f"🔧 Exporting {collection_name} embeddings to a float16 matrix...")
+    total = get_collection(collection_name).count()
+    if not total:
+        print(f"❌ {collection_name} is empty, nothing to export.")
+        return None
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Pages are written straight into the memory-mapped file, so the full
+    # float32 matrix never has to sit in memory
+    matrix, doc_ids, sources, hashes, offset = None, [], [], [], 0
+    for page in iter_collection_pages(collection_name, page_size, include=("metadatas", "embeddings")):
+        block = np.asarray(page["embeddings"], dtype=np.float32)
+        block = normalize_rows(block)
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(
+                os.path.join(out_dir, MATRIX_FILE), mode="w+", dtype=np.float16, shape=(total, block.shape[1])
+            )
+        matrix[offset:offset + len(block)] = block.astype(np.float16)
+        offset += len(block)
+        for meta in page["metadatas"]:
+            meta = meta or {}
+            doc_ids.append(int(meta.get("doc_id", -1)))
+            sources.append(str(meta.get("source", "")))
+            hashes.append(str(meta.get("content_hash", "")))
+    matrix.flush()
+
+    rows = np.empty(offset, dtype=[
+        ("doc_id", np.int64),
+        ("source", f"U{max(map(len, sources)) or 1}"),
+        ("content_hash", f"U{max(map(len, hashes)) or 1}")
+    ])
+    rows["doc_id"] = doc_ids
+    rows["source"] = sources
+    rows["content_hash"] = hashes
+    np.save(os.path.join(out_dir, ROWS_FILE), rows)
+    print(f"✅ Exported {offset} x {matrix.shape[1]} float16 matrix to: {out_dir}")
+    return os.path.join(out_dir, MATRIX_FILE)
+
+def load_embedding_matrix(out_dir=EMBEDDINGS_DIR):
+    matrix = np.load(os.path.join(out_dir, MATRIX_FILE), mmap_mode="r")
+    rows = np.load(os.path.join(out_dir, ROWS_FILE))
+    return matrix, rows
+
+def brute_force_search(query_embeddings, top_k=10, matrix=None, block_size=65536):
+    # Exact cosine top-k for a batch of queries; returns (rows (Q, k), scores (Q, k))
+    if matrix is None:
+        matrix, _ = load_embedding_matrix()
+    queries = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+
+    scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+        scores[:, start:start + len(block)] = queries @ block.T
+
+    k = min(top_k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+_stores = {}
+
+def get_vector_store(backend=None):
+    backend = backend or VECTOR_BACKEND
+    if backend not in _stores:
+        if backend == "faiss":
+            _stores[backend] = FaissVectorStore()
+        elif backend == "chroma":
+            _stores[backend] = ChromaVectorStore()
+        else:
+            raise ValueError(f"Unknown vector backend '{backend}', expected 'chroma' or 'faiss'")
+    return _stores[backend]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a FAISS index or a float16 embedding matrix from research_index.")
+    parser.add_argument("--type", choices=FAISS_INDEX_TYPES, default="flat",
+                        help="flat inner-product for small corpora, ivf or hnsw for larger ones")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF cells (default: 4 * sqrt(num_docs))")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW neighbours per node")
+    parser.add_argument("--npy", action="store_true",
+                        help="export a memory-mapped float16 matrix with aligned doc_id/source rows instead")
+    args = parser.parse_args()
+    if args.npy:
+        export_embedding_matrix()
+    else:
+        build_faiss_index(args.type, nlist=args.nlist, hnsw_m=args.hnsw_m)
@@ -19,6 +19,9 @@ datasources = {
     "Research_current_highlights": data_path("current_research_highlights.csv")
 }
 
+# Rows per encode call / Chroma upsert when rebuilding the vector DB
+INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE", 64))
+
 if __name__ == "__main__":
     print("🔄 Running scraper...")
     scraper.main()
@@ -37,5 +40,5 @@ if __name__ == "__main__":
         else:
             print(f"⚠️ Warning: {name} file not found at {path}")
 
-    build_vector_db()
+    build_vector_db(batch_size=INDEX_BATCH_SIZE)
     
\ No newline at end of file
@@ -15,7 +15,10 @@ echo "🧠 Training intent classifier..."
 python modules/module2/train_intent_classifier.py
 
 echo "🧱 Building Roberta-based index..."
-python modules/module2/roberta_index.py
+python -m modules.module2.roberta_index
+
+# Optional: serve research_index from a local FAISS index instead of Chroma
+# python -m modules.module2.vector_store --type hnsw && export VECTOR_BACKEND=faiss
 
 echo "🚀 Launching Streamlit app..."
 streamlit run final_app.py
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import argparse
+from collections import defaultdict
+
+# Replays an archive recorded with SCRAPER_SOURCE=record through the scraper's
+# parsers and the summarizers' HTML extraction, once per HTML backend: reports
+# parse throughput (pages/sec) per page kind, how many items each kind yielded
+# (so selector regressions show up offline) and how often each backend's output
+# matches the first backend's
+from scrapers.scraper import PAGE_ARCHIVE, PAGE_PARSERS
+from scrapers.helpers import html_parsing
+from scrapers.helpers.crawl_cache import CrawlCache
+from scrapers.helpers.page_source import PageArchive
+
+# Run over every page, whatever its kind
+SUMMARIZER_PARSERS = {
+    "clean_html": lambda html, url: html_parsing.clean_html(html),
+    "extract_abstract": html_parsing.extract_abstract
+}
+
+def count_items(result):
+    if isinstance(result, dict) and "sections" in result:
+        return sum(len(v) if isinstance(v, list) else 1 for v in result["sections"].values())
+    if isinstance(result, str):
+        return int(bool(result))
+    return len(result)
+
+def same_result(a, b):
+    return a.equals(b) if hasattr(a, "equals") else a == b
+
+def load_jobs(archive_path, include_cache=False):
+    pages, kinds = PageArchive(archive_path).load()
+    if include_cache:
+        # Pages fetched through the crawl cache, e.g. rendered publication pages
+        cache = CrawlCache()
+        for url in cache.index:
+            if url not in pages:
+                body = cache.read_body(url)
+                if body:
+                    pages[url] = body
+                    kinds[url] = set()
+
+    jobs = []
+    for url in pages:
+        for kind in sorted(kinds[url]):
+            if kind in PAGE_PARSERS:
+                jobs.append((url, kind, lambda html, url, parse=PAGE_PARSERS[kind]: parse(html)))
+        for kind, parse in SUMMARIZER_PARSERS.items():
+            jobs.append((url, kind, parse))
+    return pages, jobs
+
+def run_backend(backend, pages, jobs, repeat):
+    html_parsing.HTML_BACKEND = backend
+    seconds, counts, items, results = defaultdict(float), defaultdict(int), defaultdict(int), {}
+    for url, kind, parse in jobs:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = parse(pages[url], url)
+        seconds[kind] += (time.perf_counter() - start) / repeat
+        counts[kind] += 1
+        items[kind] += count_items(result)
+        results[(url, kind)] = result
+    return seconds, counts, items, results
+
+def benchmark(archive_path=PAGE_ARCHIVE, repeat=3, backends=html_parsing.HTML_BACKENDS, include_cache=False):
+    pages, jobs = load_jobs(archive_path, include_cache)
+    print(f"\n🚀 Parsing {len(pages)} archived pages ({len(jobs)} parser runs) x {repeat} from: {archive_path}\n")
+
+    report = {"archive": archive_path, "pages": len(pages), "backends": {}}
+    baseline = None
+    for backend in backends:
+        if backend == "lxml" and not html_parsing.LXML_AVAILABLE:
+            print("⚠️ lxml is not installed, skipping the lxml backend")
+            continue
+        seconds, counts, items, results = run_backend(backend, pages, jobs, repeat)
+        baseline = baseline or results
+
+        print(f"  [{backend}]")
+        backend_report = {"kinds": {}}
+        for kind in sorted(counts):
+            keys = [key for key in results if key[1] == kind]
+            agreement = sum(same_result(results[key], baseline[key]) for key in keys) / len(keys)
+            backend_report["kinds"][kind] = {
+                "pages": counts[kind],
+                "items": items[kind],
+                "pages_per_sec": round(counts[kind] / max(seconds[kind], 1e-9), 1),
+                "agreement": round(agreement, 4)
+            }
+            print(f"    {kind:24s} {counts[kind]:5d} pages  {items[kind]:6d} items  "
+                  f"{backend_report['kinds'][kind]['pages_per_sec']:8.1f} pages/s  agreement {agreement:.2%}")
+        backend_report["pages_per_sec"] = round(len(jobs) / max(sum(seconds.values()), 1e-9), 1)
+        print(f"    overall: {backend_report['pages_per_sec']} pages/s\n")
+        report["backends"][backend] = backend_report
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scraper and summarizer parsing over a recorded page archive.")
+    parser.add_argument("--archive", default=PAGE_ARCHIVE, help="gzipped JSONL archive recorded with SCRAPER_SOURCE=record")
+    parser.add_argument("--repeat", type=int, default=3, help="parses per page")
+    parser.add_argument("--backends", nargs="+", choices=html_parsing.HTML_BACKENDS, default=list(html_parsing.HTML_BACKENDS))
+    parser.add_argument("--include-cache", action="store_true", help="also parse pages stored in the crawl cache")
+    parser.add_argument("--output", default="./evaluations/results/parse_benchmark.json")
+    args = parser.parse_args()
+
+    report = benchmark(args.archive, args.repeat, args.backends, args.include_cache)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Results saved to: {args.output}")
@@ -0,0 +1,159 @@
+import time
+import asyncio
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+from scrapers.helpers.fetcher import USER_AGENT
+
+STEALTH_SCRIPT = """
+Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+window.navigator.chrome = { runtime: {} };
+Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
+Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3] });
+"""
+
+# A page counts as ready once one of the containers extract_abstract reads is
+# in the DOM, or once the network goes idle, whichever comes first
+READY_SELECTOR = ", ".join([
+    "section#abstract", "div#abstract", "section#abstracts", "div#abstracts",
+    "blockquote.abstract", "div.paper-data", "[class*='abstract']"
+])
+
+# Resource types never needed for the page text
+BLOCKED_RESOURCES = ("image", "media", "font")
+
+# Spaces out page loads on the same domain by min_interval seconds. A failure
+# (error status, CAPTCHA) doubles the domain's extra delay up to max_delay and
+# pushes its next slot out; a success clears it. Slots are re-checked after
+# every sleep, so a penalty also delays loads that were already waiting.
+class DomainBackoff:
+    def __init__(self, min_interval=1.0, base_delay=2.0, max_delay=120.0):
+        self.min_interval = min_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._next_slot = {}
+        self._penalty = {}
+
+    async def wait(self, url):
+        domain = urlparse(url).netloc
+        while True:
+            now = time.monotonic()
+            slot = self._next_slot.get(domain, 0.0)
+            if slot <= now:
+                self._next_slot[domain] = now + self.min_interval + self._penalty.get(domain, 0.0)
+                return
+            await asyncio.sleep(slot - now)
+
+    def failure(self, url):
+        domain = urlparse(url).netloc
+        penalty = min(self.max_delay, max(self.base_delay, 2 * self._penalty.get(domain, 0.0)))
+        self._penalty[domain] = penalty
+        self._next_slot[domain] = max(self._next_slot.get(domain, 0.0), time.monotonic() + penalty)
+        return penalty
+
+    def success(self, url):
+        self._penalty.pop(urlparse(url).netloc, None)
+
+# One Chromium browser and one stealth context for the whole run; each fetch
+# opens a page in that context (so cookies such as Cloudflare clearance are
+# shared), with at most `pages` open at a time. Use as
+#   async with PlaywrightPagePool(pages=8) as pool:
+#       html, response = await pool.fetch(url)
+# The pool never writes to a CrawlCache: the caller stores a page (with the
+# validators in `response`) only once it has accepted the content.
+class PlaywrightPagePool:
+    def __init__(self, pages=8, headless=False, ready_timeout=15, nav_timeout=60,
+                 domain_interval=1.0, max_backoff=120.0, block_resources=BLOCKED_RESOURCES):
+        self.pages = pages
+        self.headless = headless
+        self.ready_timeout = ready_timeout
+        self.nav_timeout = nav_timeout
+        self.block_resources = block_resources
+        self.backoff = DomainBackoff(domain_interval, max_delay=max_backoff)
+        self._semaphore = asyncio.Semaphore(pages)
+        self._playwright = None
+        self.browser = None
+        self.context = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.context = await self.browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={"width": 1280, "height": 800},
+            java_script_enabled=True,
+            locale="en-US"
+        )
+        await self.context.add_init_script(STEALTH_SCRIPT)
+        if self.block_resources:
+            await self.context.route("**/*", self._route)
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = self.context = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _route(self, route):
+        if route.request.resource_type in self.block_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _wait_ready(self, page):
+        # Whichever finishes first; a timeout just means parse what is there
+        timeout = self.ready_timeout * 1000
+        waits = {
+            asyncio.ensure_future(page.wait_for_selector(READY_SELECTOR, state="attached", timeout=timeout)),
+            asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=timeout))
+        }
+        done, pending = await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*waits, return_exceptions=True)
+
+    async def run_limited(self, url, func, *args):
+        # Plain-HTTP work for a page (e.g. cache revalidation) runs in a thread
+        # but takes the same domain slot and page limit as a browser load
+        await self.backoff.wait(url)
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def fetch(self, url):
+        # (rendered HTML, {"status", "etag", "last_modified"}), or ("", None) on
+        # failure (the domain is backed off)
+        await self.backoff.wait(url)
+        async with self._semaphore:
+            page = await self.context.new_page()
+            try:
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=self.nav_timeout * 1000)
+                await self._wait_ready(page)
+                html = await page.content()
+            except Exception as e:
+                print(f"Error loading {url}: {e}")
+                self.backoff.failure(url)
+                return "", None
+            finally:
+                await page.close()
+
+        if response is not None and (response.status == 429 or response.status >= 500):
+            delay = self.backoff.failure(url)
+            print(f"HTTP {response.status} from {url}, backing off {urlparse(url).netloc} for {delay:.0f}s")
+            return "", None
+        if response is None or response.status < 400:
+            self.backoff.success(url)
+        if response is None:
+            return html, None
+        return html, {
+            "status": response.status,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified")
+        }
@@ -0,0 +1,105 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CRAWL_CACHE_DIR = os.path.join(BASE_DIR, "..", "..", "modules", "data", "crawl_cache")
+
+def url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# On-disk HTTP response cache keyed by URL. index.json keeps the validators
+# (ETag / Last-Modified) and content hash per URL, bodies are gzipped under
+# bodies/. Every URL touched in this run is recorded as "changed" (new or
+# different content), "unchanged" (304 or same hash) so a manifest of changed
+# URLs can drive incremental reindexing downstream.
+class CrawlCache:
+    def __init__(self, cache_dir=CRAWL_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.bodies_dir = os.path.join(cache_dir, "bodies")
+        os.makedirs(self.bodies_dir, exist_ok=True)
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        self.run_status = {}
+        self._lock = threading.Lock()
+
+    def _body_path(self, url):
+        return os.path.join(self.bodies_dir, url_key(url) + ".html.gz")
+
+    def lookup(self, url):
+        with self._lock:
+            return self.index.get(url)
+
+    def read_body(self, url):
+        path = self._body_path(url)
+        if url not in self.index or not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def conditional_headers(self, url):
+        entry = self.lookup(url)
+        if not entry or not os.path.exists(self._body_path(url)):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, body, etag=None, last_modified=None):
+        # Returns True when the content is new or differs from the cached copy
+        digest = content_hash(body)
+        with self._lock:
+            previous = self.index.get(url)
+            changed = not previous or previous.get("content_hash") != digest
+            if changed:
+                with gzip.open(self._body_path(url), "wt", encoding="utf-8") as f:
+                    f.write(body)
+            self.index[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": digest,
+                "fetched_at": time.time()
+            }
+            self.run_status[url] = "changed" if changed else "unchanged"
+        return changed
+
+    def mark_unchanged(self, url):
+        with self._lock:
+            self.index[url]["fetched_at"] = time.time()
+            self.run_status[url] = "unchanged"
+
+    def changed_urls(self):
+        return sorted(url for url, status in self.run_status.items() if status == "changed")
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+
+    def write_manifest(self, path):
+        changed = self.changed_urls()
+        manifest = {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "fetched": len(self.run_status),
+            "unchanged": len(self.run_status) - len(changed),
+            "changed": changed
+        }
+        with open(path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        print(f"Changed-URL manifest ({len(changed)} of {len(self.run_status)} changed) saved to: {path}")
+        return manifest
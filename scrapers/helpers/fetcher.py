@@ -0,0 +1,82 @@
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36")
+
+# Spaces out requests to the same host by at least min_interval seconds,
+# however many worker threads are fetching from it
+class HostRateLimiter:
+    def __init__(self, min_interval=0.25):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+# Plain-HTTP fetcher for pages that don't need JavaScript: one pooled
+# requests.Session (keep-alive, retries with backoff) shared by a bounded
+# thread pool. With a CrawlCache, cached URLs are revalidated with conditional
+# requests and a 304 is served from disk.
+class PooledFetcher:
+    def __init__(self, max_workers=8, per_host_interval=0.25, timeout=20, retries=3, cache=None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = HostRateLimiter(per_host_interval)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def fetch(self, url):
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        self.rate_limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and self.cache:
+            self.cache.mark_unchanged(url)
+            return self.cache.read_body(url)
+        response.raise_for_status()
+        if self.cache:
+            self.cache.store(
+                url, response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        return response.text
+
+    def fetch_many(self, urls, handler=None):
+        # Runs handler (default: fetch) once per unique URL on the worker pool;
+        # returns {url: result}, with None for URLs that failed
+        handler = handler or self.fetch
+        unique_urls = list(dict.fromkeys(urls))
+
+        def run(url):
+            try:
+                return url, handler(url)
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+                return url, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(executor.map(run, unique_urls))
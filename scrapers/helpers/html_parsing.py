@@ -0,0 +1,172 @@
+import os
+from html import unescape
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup, SoupStrainer
+
+# === HTML parsing backends ===
+# "lxml"         lxml tree builder, and callers pass a SoupStrainer so only the
+#                subtrees they read are built; extract_abstract queries the lxml
+#                tree directly with XPath
+# "html.parser"  the original full-tree parse with Python's html.parser
+# HTML_BACKEND picks one; lxml is used by default when it is installed.
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+HTML_BACKENDS = ("lxml", "html.parser")
+HTML_BACKEND = os.environ.get("HTML_BACKEND", "lxml" if LXML_AVAILABLE else "html.parser")
+
+def has_class(name):
+    # Strainer attribute matcher for one class token ("a" matches class="a b")
+    def match(value):
+        if not value:
+            return False
+        return name in (value.split() if isinstance(value, str) else value)
+    return match
+
+def make_soup(html, parse_only=None):
+    if HTML_BACKEND == "lxml":
+        return BeautifulSoup(html, "lxml", parse_only=parse_only)
+    return BeautifulSoup(html, "html.parser")
+
+def normalize_text(text):
+    text = text.replace("\n", " ").strip()
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return text
+
+# === Lab pages (lab_summarizer) ===
+CLEAN_HTML_STRAINER = SoupStrainer(["title", "meta", "h1", "h2", "h3", "p"])
+
+def clean_html(html):
+    soup = make_soup(html, CLEAN_HTML_STRAINER)
+
+    # Extract <title>
+    title = soup.title.string.strip() if soup.title else ""
+
+    # Extract <meta name="description">
+    meta_desc = ""
+    meta_tag = soup.find("meta", attrs={"name": "description"})
+    if meta_tag and meta_tag.get("content"):
+        meta_desc = meta_tag["content"].strip()
+
+    # Extract headings (h1–h3)
+    headings = [h.get_text(strip=True) for h in soup.find_all(['h1', 'h2', 'h3'])]
+
+    # Extract key paragraphs (limit to first 5)
+    paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
+    paragraphs = paragraphs[0:20]
+
+    # Combine everything
+    parts = [title, meta_desc] + headings + paragraphs
+    text = '\n'.join(part for part in parts if part)
+
+    return text
+
+# === Publication pages (paper_summarizer) ===
+def extract_abstract(html, url=""):
+    if HTML_BACKEND == "lxml":
+        text = _extract_abstract_lxml(html, url)
+    else:
+        text = _extract_abstract_soup(html, url)
+    text = normalize_text(text)
+    return unescape(text) if len(text) else "No summary"
+
+def _extract_abstract_soup(html, url=""):
+    soup = BeautifulSoup(html, "html.parser")
+    text = ""
+    domain = urlparse(url).netloc.lower()
+
+    # 🔹 Custom logic for NDSS Symposium
+    if "ndss-symposium.org" in domain:
+        paper_div = soup.find("div", class_="paper-data")
+        if paper_div:
+            paragraphs = paper_div.find_all("p")
+            text = " ".join(p.get_text(separator=" ", strip=True) for p in paragraphs)
+
+    # 🔹 Try standard abstract containers
+    elif not text:
+        abstract_section = (
+            soup.find("section", id="abstract") or
+            soup.find("div", id="abstracts") or
+            soup.find("section", id="abstracts") or
+            soup.find("div", id="abstract")
+        )
+
+        if abstract_section:
+            paragraphs = abstract_section.find_all(["p", "div"], attrs={"role": "paragraph"})
+            if not paragraphs:
+                text = abstract_section.get_text(separator=" ", strip=True)
+            else:
+                text = " ".join(p.get_text(separator=" ", strip=True) for p in paragraphs)
+        else:
+            block = soup.find("blockquote", class_="abstract")
+            if block:
+                text = block.get_text(strip=True).replace("Abstract:", "").strip()
+            else:
+                possible_abstracts = soup.find_all(lambda tag:
+                    tag.name in ["p", "div", "section"] and (
+                        any("abstract" in (cls or "").lower() for cls in (tag.get("class") or [])) or
+                        "abstract" in (tag.get("id") or "").lower()
+                    )
+                )
+
+                if not possible_abstracts:
+                    possible_abstracts = soup.find_all("p", limit=5)
+
+                text = " ".join(p.get_text(separator=" ", strip=True) for p in possible_abstracts)
+
+    return text
+
+# Same precedence as _extract_abstract_soup, as XPath over one lxml parse
+_CLASS_TOKEN = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+_LOWER = "translate({}, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_NDSS_XPATH = f"//div[{_CLASS_TOKEN.format('paper-data')}]"
+_SECTION_XPATHS = ("//section[@id='abstract']", "//div[@id='abstracts']",
+                   "//section[@id='abstracts']", "//div[@id='abstract']")
+_BLOCKQUOTE_XPATH = f"//blockquote[{_CLASS_TOKEN.format('abstract')}]"
+_CANDIDATES_XPATH = (
+    "//*[self::p or self::div or self::section]"
+    f"[contains({_LOWER.format('@class')}, 'abstract') or contains({_LOWER.format('@id')}, 'abstract')]"
+)
+_TEXT_XPATH = ".//text()[not(ancestor::script) and not(ancestor::style)]"
+
+def _element_text(element, separator=" "):
+    return separator.join(t.strip() for t in element.xpath(_TEXT_XPATH) if t.strip())
+
+def _first(tree, xpath):
+    found = tree.xpath(xpath)
+    return found[0] if found else None
+
+def _extract_abstract_lxml(html, url=""):
+    if not html or not html.strip():
+        return ""
+    try:
+        tree = lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration
+        tree = lxml.html.document_fromstring(html.encode("utf-8"))
+    domain = urlparse(url).netloc.lower()
+
+    if "ndss-symposium.org" in domain:
+        paper_div = _first(tree, _NDSS_XPATH)
+        if paper_div is None:
+            return ""
+        return " ".join(_element_text(p) for p in paper_div.xpath(".//p"))
+
+    for xpath in _SECTION_XPATHS:
+        abstract_section = _first(tree, xpath)
+        if abstract_section is not None:
+            paragraphs = abstract_section.xpath(".//*[self::p or self::div][@role='paragraph']")
+            if not paragraphs:
+                return _element_text(abstract_section)
+            return " ".join(_element_text(p) for p in paragraphs)
+
+    block = _first(tree, _BLOCKQUOTE_XPATH)
+    if block is not None:
+        return _element_text(block, separator="").replace("Abstract:", "").strip()
+
+    possible_abstracts = tree.xpath(_CANDIDATES_XPATH) or tree.xpath("(//p)[position() <= 5]")
+    return " ".join(_element_text(p) for p in possible_abstracts)
@@ -1,10 +1,11 @@
 import base64
 import csv
 import pandas as pd
-from bs4 import BeautifulSoup
 from transformers import pipeline
 from tqdm import tqdm
 from transformers import AutoTokenizer
+# Raw HTML is cleaned with lxml + SoupStrainer by default, see html_parsing.HTML_BACKEND
+from scrapers.helpers.html_parsing import clean_html
 
 
 tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-cnn")
@@ -14,32 +15,6 @@ summarizer = pipeline("summarization", model="facebook/bart-large-cnn", device=0
 def decode_html(encoded):
     return base64.b64decode(encoded).decode('utf-8')
 
-# 2. Clean raw HTML
-def clean_html(html):
-    soup = BeautifulSoup(html, 'html.parser')
-
-    # Extract <title>
-    title = soup.title.string.strip() if soup.title else ""
-
-    # Extract <meta name="description">
-    meta_desc = ""
-    meta_tag = soup.find("meta", attrs={"name": "description"})
-    if meta_tag and meta_tag.get("content"):
-        meta_desc = meta_tag["content"].strip()
-
-    # Extract headings (h1–h3)
-    headings = [h.get_text(strip=True) for h in soup.find_all(['h1', 'h2', 'h3'])]
-
-    # Extract key paragraphs (limit to first 5)
-    paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
-    paragraphs = paragraphs[0:20]
-
-    # Combine everything
-    parts = [title, meta_desc] + headings + paragraphs
-    text = '\n'.join(part for part in parts if part)
-
-    return text
-
 # 3. Chunk cleaned text into ~500-word pieces
 def chunk_text(text, max_words=500):
     words = text.split()
@@ -0,0 +1,143 @@
+import os
+import gzip
+import json
+import time
+import threading
+
+# === Pluggable page sources for the scraper ===
+# Every page the scraper parses goes through page_source.get(url, kind=...):
+#   live    plain HTTP first (pooled, cached), Chrome only when the page needs JavaScript
+#   record  live, and every page is appended to a gzipped JSONL archive
+#   replay  pages are served from the archive; no network and no browser
+# "kind" names the parser a page feeds, so archived pages can be re-parsed
+# and benchmarked offline (scrapers/benchmark_parse.py).
+
+class LazyChrome:
+    # Starts the browser on first use, so importing the scraper (or replaying
+    # an archive) never launches Chrome
+    def __init__(self, factory):
+        self._factory = factory
+        self._driver = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._driver is None:
+                self._driver = self._factory()
+            return self._driver
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._get(), name)
+
+    def close(self):
+        if self._driver is not None:
+            self._driver.close()
+
+    def quit(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+class LivePageSource:
+    def __init__(self, fetcher, driver, driver_lock=None, render_settle=2):
+        self.fetcher = fetcher
+        self.driver = driver
+        self.driver_lock = driver_lock or threading.Lock()
+        self.render_settle = render_settle
+
+    def get(self, url, kind=None, wait_for_class=None, render=False):
+        # Server HTML when it already contains wait_for_class; otherwise (or
+        # with render=True) load the page in Chrome and wait for the content
+        if not render:
+            html = self.fetcher.fetch(url)
+            if wait_for_class is None or wait_for_class in html:
+                return html
+        return self.render(url, wait_for_class)
+
+    def render(self, url, wait_for_class=None):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self.driver_lock:
+            self.driver.get(url)
+            if wait_for_class:
+                WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, wait_for_class)))
+            else:
+                WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "main")))
+                time.sleep(self.render_settle)
+            return self.driver.page_source
+
+    def close(self):
+        self.driver.close()
+        self.driver.quit()
+
+# One JSON record per page: {"url", "kind", "html", "recorded_at"}. Each
+# write is its own gzip member, so recording appends to an existing archive.
+class PageArchive:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, url, kind, html):
+        record = {"url": url, "kind": kind, "html": html, "recorded_at": time.time()}
+        with self._lock:
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def load(self):
+        # Returns ({url: html}, {url: set of kinds}); later records win
+        pages, kinds = {}, {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                pages[record["url"]] = record["html"]
+                kinds.setdefault(record["url"], set()).add(record["kind"])
+        return pages, kinds
+
+class RecordingPageSource:
+    def __init__(self, source, archive_path):
+        self.source = source
+        self.archive = PageArchive(archive_path)
+
+    def get(self, url, kind=None, **kwargs):
+        html = self.source.get(url, kind=kind, **kwargs)
+        if html:
+            self.archive.append(url, kind, html)
+        return html
+
+    def close(self):
+        self.source.close()
+
+class PageNotRecorded(KeyError):
+    pass
+
+class ReplayPageSource:
+    def __init__(self, archive_path):
+        self.pages, self.kinds = PageArchive(archive_path).load()
+        print(f"Replaying {len(self.pages)} archived pages from: {archive_path}")
+
+    def get(self, url, kind=None, **kwargs):
+        if url not in self.pages:
+            raise PageNotRecorded(url)
+        return self.pages[url]
+
+    def close(self):
+        pass
+
+PAGE_SOURCES = ("live", "record", "replay")
+
+def make_page_source(mode, archive_path, live_factory):
+    if mode not in PAGE_SOURCES:
+        raise ValueError(f"Unknown page source '{mode}', expected one of {PAGE_SOURCES}")
+    if mode == "replay":
+        return ReplayPageSource(archive_path)
+    live = live_factory()
+    if mode == "record":
+        os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+        return RecordingPageSource(live, archive_path)
+    return live
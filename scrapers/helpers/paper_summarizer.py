@@ -1,12 +1,16 @@
 import pandas as pd
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 from transformers import pipeline
-from playwright.async_api import async_playwright
-from html import unescape
 import asyncio
 import os
+import time
+import requests
 from transformers import AutoTokenizer
+from scrapers.helpers.crawl_cache import CrawlCache
+from scrapers.helpers.fetcher import USER_AGENT
+# Abstract extraction lives in html_parsing (lxml + XPath by default, see HTML_BACKEND)
+from scrapers.helpers.html_parsing import extract_abstract
+from scrapers.helpers.browser_pool import PlaywrightPagePool
 
 tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-cnn")
 
@@ -15,68 +19,6 @@ os.environ["CUDA_LAUNCH_BLOCKING"] = "1"
 # ✅ 1. Summarizer (BART on CUDA)
 summarizer = pipeline("summarization", model="facebook/bart-large-cnn", device=0)
 
-# ✅ 2. Extract abstract from HTML
-from html import unescape
-
-from bs4 import BeautifulSoup
-from html import unescape
-
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-from html import unescape
-
-def extract_abstract(html, url=""):
-    soup = BeautifulSoup(html, "html.parser")
-    text = ""
-    domain = urlparse(url).netloc.lower()
-
-    # 🔹 Custom logic for NDSS Symposium
-    if "ndss-symposium.org" in domain:
-        paper_div = soup.find("div", class_="paper-data")
-        if paper_div:
-            paragraphs = paper_div.find_all("p")
-            text = " ".join(p.get_text(separator=" ", strip=True) for p in paragraphs)
-
-    # 🔹 Try standard abstract containers
-    elif not text:
-        abstract_section = (
-            soup.find("section", id="abstract") or
-            soup.find("div", id="abstracts") or
-            soup.find("section", id="abstracts") or
-            soup.find("div", id="abstract")
-        )
-
-        if abstract_section:
-            paragraphs = abstract_section.find_all(["p", "div"], attrs={"role": "paragraph"})
-            if not paragraphs:
-                text = abstract_section.get_text(separator=" ", strip=True)
-            else:
-                text = " ".join(p.get_text(separator=" ", strip=True) for p in paragraphs)
-        else:
-            block = soup.find("blockquote", class_="abstract")
-            if block:
-                text = block.get_text(strip=True).replace("Abstract:", "").strip()
-            else:
-                possible_abstracts = soup.find_all(lambda tag:
-                    tag.name in ["p", "div", "section"] and (
-                        any("abstract" in (cls or "").lower() for cls in (tag.get("class") or [])) or
-                        "abstract" in (tag.get("id") or "").lower()
-                    )
-                )
-
-                if not possible_abstracts:
-                    possible_abstracts = soup.find_all("p", limit=5)
-
-                text = " ".join(p.get_text(separator=" ", strip=True) for p in possible_abstracts)
-
-    # ✅ Clean and normalize whitespace
-    text = text.replace("\n", " ").strip()
-    while "  " in text:
-        text = text.replace("  ", " ")
-
-    return unescape(text) if len(text) else "No summary"
-
-
 # ✅ 3. Hierarchical summarization
 def summarize_long_text(text, max_chunk_words=500):
     words = text.split()
@@ -139,91 +81,130 @@ def summarize_text(text):
         return summarize_long_text(text, max_chunk_words=500)  # Single-shot if short
     return summarize_long_text(text)  # Hierarchical for long inputs
 
-# ✅ 5. Async stealth browser to fetch HTML
-async def fetch_html_playwright(url, wait=15):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                       "(KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 800},
-            java_script_enabled=True,
-            locale="en-US"
-        )
-        page = await context.new_page()
-
-        await page.add_init_script("""
-        Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-        window.navigator.chrome = { runtime: {} };
-        Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
-        Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3] });
-        """)
+# ✅ 5. Async stealth browser to fetch HTML (see browser_pool)
+# Rendered pages are kept in the crawl cache with the response validators; a
+# later run sends a conditional GET first and skips the browser on a 304.
+# Returns (cached body or None, HTTP status or None).
+def revalidate_cached(cache, url, timeout=20):
+    headers = cache.conditional_headers(url)
+    if not headers:
+        return None, None
+    headers["User-Agent"] = USER_AGENT
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        return None, None
+    if response.status_code != 304:
+        return None, response.status_code
+    cache.mark_unchanged(url)
+    return cache.read_body(url), 304
+
+def is_captcha(text):
+    return "verify you are human" in text.lower()
+
+def store_page(cache, url, html, response):
+    # Only accepted 2xx pages are cached, never CAPTCHA or error pages
+    if cache is not None and html and response is not None and 200 <= response["status"] < 300:
+        cache.store(url, html, etag=response["etag"], last_modified=response["last_modified"])
+
+async def fetch_html_playwright(url, wait=15, cache=None):
+    # One-off fetch; process_publications shares one pool across all links
+    async with PlaywrightPagePool(pages=1, ready_timeout=wait) as pool:
+        html, response = await pool.fetch(url)
+    if not is_captcha(html):
+        store_page(cache, url, html, response)
+    return html
+
+# BART runs one input at a time on the GPU (summarize_lock, one per run), off
+# the event loop so page loads keep going while a summary is computed
+async def summarize_publication(pool, link, summarize_lock, cache=None, max_retries=2):
+    for retry_count in range(max_retries):
+        # A cached body is only trusted on the first try; a retry follows a CAPTCHA
+        html, response = None, None
+        if cache is not None and retry_count == 0 and cache.conditional_headers(link):
+            # Revalidation is rate limited and backed off per domain like a page load
+            html, status = await pool.run_limited(link, revalidate_cached, cache, link)
+            if status is not None and (status == 429 or status >= 500):
+                pool.backoff.failure(link)
+        if not html:
+            html, response = await pool.fetch(link)
+        if not html:
+            continue
 
-        try:
-            await page.goto(url, timeout=60000)
-            await page.wait_for_timeout(wait * 1000)
-            html = await page.content()
-            await browser.close()
-            return html
-        except Exception as e:
-            print(f"Error loading {url}: {e}")
-            await browser.close()
-            return ""
+        abstract = extract_abstract(html, link)
+
+        # Check for CAPTCHA/Cloudflare text; the retry waits out the domain's backoff
+        if is_captcha(abstract):
+            delay = pool.backoff.failure(link)
+            print(f"CAPTCHA triggered on try {retry_count + 1} for: {link} (backing off {delay:.0f}s)")
+            continue
+
+        store_page(cache, link, html, response)
+        async with summarize_lock:
+            return await asyncio.to_thread(summarize_text, abstract)
+    return ""
 
 # ✅ 6. Main async loop with checkpoint saving
-async def process_publications(csv_in, csv_out, checkpoint_interval=100):
+# Links are loaded concurrently through one long-lived browser (at most `pages`
+# open at once, `domain_interval` seconds apart per domain); summaries keep
+# the CSV's row order and a checkpoint is written every checkpoint_interval
+# completed links
+async def process_publications(csv_in, csv_out, checkpoint_interval=100, use_cache=True,
+                               pages=8, domain_interval=1.0):
     df = pd.read_csv(csv_in)
-    summaries = []
+    summaries = [""] * len(df)
+    cache = CrawlCache() if use_cache else None
 
-    for idx, link in enumerate(tqdm(df["Publication Link"], desc="Scraping & summarizing")):
+    pending = []
+    for idx, link in enumerate(df["Publication Link"]):
         if not isinstance(link, str) or not link.startswith("http"):
-            summaries.append("Invalid URL")
-            continue
-
-        if str(link).lower().endswith(".pdf") or "pdf" in str(link).lower():
-            summaries.append("Skipped (PDF)")
+            summaries[idx] = "Invalid URL"
+        elif str(link).lower().endswith(".pdf") or "pdf" in str(link).lower():
+            summaries[idx] = "Skipped (PDF)"
         else:
-            max_retries = 2
-            retry_count = 0
-            summary = ""
-
-            while retry_count < max_retries:
-                html = await fetch_html_playwright(link)
-                if not html:
-                    retry_count += 1
-                    continue
-
-                abstract = extract_abstract(html,link)
-
-                # Check for CAPTCHA/Cloudflare text
-                if "verify you are human" in abstract.lower():
-                    print(f"CAPTCHA triggered on try {retry_count + 1} for: {link}")
-                    retry_count += 1
-                    await asyncio.sleep(2 * retry_count)  # backoff
-                    continue
-
-                summary = summarize_text(abstract)
-                break  # exit loop if successful
-
+            pending.append((idx, link))
+
+    def save_checkpoint(done):
+        df_partial = df.copy()
+        df_partial["Publication Summary"] = summaries
+        df_partial.to_csv(csv_out, index=False, encoding="utf-8", quoting=1)
+        if cache is not None:
+            cache.save()
+        print(f"Saved checkpoint at {done} / {len(pending)} links")
+
+    summarize_lock = asyncio.Lock()
+
+    async def run(idx, link):
+        return idx, link, await summarize_publication(pool, link, summarize_lock, cache)
+
+    start = time.perf_counter()
+    async with PlaywrightPagePool(pages=pages, domain_interval=domain_interval) as pool:
+        tasks = [asyncio.create_task(run(idx, link)) for idx, link in pending]
+        for done, task in enumerate(tqdm(asyncio.as_completed(tasks), total=len(tasks),
+                                         desc="Scraping & summarizing"), start=1):
+            idx, link, summary = await task
             if not summary:
-                summaries.append("Failed after retries")
+                summaries[idx] = "Failed after retries"
                 with open("captcha_failed_links.txt", "a") as f:
                     f.write(link + "\n")
             else:
-                summaries.append(summary)
+                summaries[idx] = summary
 
-        # Save progress every 100 rows
-        if (idx + 1) % checkpoint_interval == 0 or idx == len(df) - 1:
-            df_partial = df.copy()
-            df_partial["Publication Summary"] = summaries + [""] * (len(df_partial) - len(summaries))
-            df_partial.to_csv(csv_out, index=False, encoding="utf-8", quoting=1)
-            print(f"Saved checkpoint at {idx + 1} / {len(df)}")
+            if done % checkpoint_interval == 0:
+                save_checkpoint(done)
 
+    elapsed = time.perf_counter() - start
+    print(f"Processed {len(pending)} links in {elapsed:.1f}s ({len(pending) / max(elapsed, 1e-9):.2f} links/s)")
+    save_checkpoint(len(pending))
+    if cache is not None:
+        cache.write_manifest(os.path.splitext(csv_out)[0] + "_changed_urls.json")
     print(f"Final CSV saved to {csv_out}")
 
 # ✅ Run the pipeline
 if __name__ == "__main__":
     asyncio.run(process_publications(
         "failed_retries.csv",
-        "failed_retries_fixed.csv"
-    ))
\ No newline at end of file
+        "failed_retries_fixed.csv",
+        pages=int(os.environ.get("PAPER_FETCH_PAGES", 8)),
+        domain_interval=float(os.environ.get("PAPER_DOMAIN_INTERVAL", 1.0))
+    ))
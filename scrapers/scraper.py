@@ -1,13 +1,14 @@
 import json
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import time
-import requests
+from bs4 import SoupStrainer
+from urllib.parse import urljoin
 import pandas as pd
 import os
+import argparse
+import threading
+from scrapers.helpers.fetcher import PooledFetcher
+from scrapers.helpers.crawl_cache import CrawlCache
+from scrapers.helpers.page_source import LazyChrome, LivePageSource, make_page_source
+from scrapers.helpers.html_parsing import has_class, make_soup
 
 # === Set Up Paths ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -27,24 +28,65 @@ institutes_and_centers_url = metadata["Khoury College of Computer Science"]["Ins
 research_spaces_url = metadata["Khoury College of Computer Science"]["Research_spaces"]["base_url"]
 labs_url = metadata["Khoury College of Computer Science"]["Labs_groups"]["base_url"]
 
-# Initialize Chrome driver
-options = uc.ChromeOptions()
-options.headless = True
-options.add_argument("--disable-blink-features=AutomationControlled")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-driver = uc.Chrome(options=options)
+# Chrome, the HTTP fetcher, the crawl cache and the page source are built on
+# first use, so importing this module (e.g. to re-parse archived pages in
+# scrapers/benchmark_parse.py) touches neither the network nor modules/data
+def make_chrome():
+    import undetected_chromedriver as uc
+
+    options = uc.ChromeOptions()
+    options.headless = True
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return uc.Chrome(options=options)
+
+# Chrome only starts the first time a page actually needs JavaScript
+driver = LazyChrome(make_chrome)
+# The Chrome driver is single-threaded; fetch workers that fall back to it take turns
+driver_lock = threading.Lock()
+
+# SCRAPER_SOURCE=live (default), record (also archive every page) or replay
+# (serve pages from the archive, offline); see scrapers/helpers/page_source.py
+SCRAPER_SOURCE = os.environ.get("SCRAPER_SOURCE", "live")
+PAGE_ARCHIVE = os.environ.get("SCRAPER_ARCHIVE", data_path("page_archive.jsonl.gz"))
+
+_services = {}
+_services_lock = threading.RLock()
+
+def _service(name, factory):
+    with _services_lock:
+        if name not in _services:
+            _services[name] = factory()
+        return _services[name]
+
+def get_crawl_cache():
+    # Responses are cached on disk and revalidated with conditional GETs
+    return _service("crawl_cache", CrawlCache)
+
+def get_fetcher():
+    # Pages that don't need JavaScript are fetched over a pooled HTTP session;
+    # replay only uses its worker pool, so it gets no cache
+    return _service("fetcher", lambda: PooledFetcher(
+        max_workers=int(os.environ.get("SCRAPER_WORKERS", 8)),
+        per_host_interval=float(os.environ.get("SCRAPER_HOST_INTERVAL", 0.25)),
+        cache=None if SCRAPER_SOURCE == "replay" else get_crawl_cache()
+    ))
+
+def get_page_source():
+    return _service("page_source", lambda: make_page_source(
+        SCRAPER_SOURCE, PAGE_ARCHIVE, lambda: LivePageSource(get_fetcher(), driver, driver_lock)
+    ))
 
 # Data container
 data = {}
 
-def get_research_areas():
-    print("Getting research areas")
-    driver.get(base_url)
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "main")))
-    time.sleep(2)
+# With the lxml backend each parser only builds the subtrees it reads
+LINK_LIST_STRAINER = SoupStrainer('li', class_=has_class('wp-block-khoury-link-list-item'))
+MAIN_STRAINER = SoupStrainer('main')
 
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
+def parse_research_areas(html):
+    soup = make_soup(html, LINK_LIST_STRAINER)
     research_area_urls = {}
     research_areas = soup.find_all('li', class_='wp-block-khoury-link-list-item')
     
@@ -53,20 +95,21 @@ def get_research_areas():
         formatted_text = area_name.lower().replace(' ', '-')
         new_url = research_url + formatted_text
         research_area_urls[area_name] = new_url
+    return research_area_urls
+
+def get_research_areas():
+    print("Getting research areas")
+    research_area_urls = parse_research_areas(
+        get_page_source().get(base_url, kind="research_areas", wait_for_class="wp-block-khoury-link-list-item")
+    )
 
     df = pd.DataFrame(list(research_area_urls.items()), columns=['Area', 'URL'])
     df.to_csv(data_path("research_areas.csv"), index=False)
     return research_area_urls
 
-def get_institutes_and_centers():
-    print("Getting institutes and centers")
+def parse_institutes_and_centers(html):
     research_data = []
-
-    driver.get(institutes_and_centers_url)
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "main")))
-    time.sleep(2)
-
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = make_soup(html, MAIN_STRAINER)
     institute_names = soup.select("main > div > div")
 
     for name_tag in institute_names[1:]:
@@ -80,52 +123,61 @@ def get_institutes_and_centers():
             "href": href
         }
         research_data.append(institute_data)
+    return research_data
+
+def get_institutes_and_centers():
+    print("Getting institutes and centers")
+    research_data = parse_institutes_and_centers(
+        get_page_source().get(institutes_and_centers_url, kind="institutes_and_centers", render=True)
+    )
 
     df = pd.DataFrame(research_data)
     df.to_csv(data_path("institutes_and_centers.csv"), index=False)
     return research_data
 
+def parse_professor_details(html):
+    soup = make_soup(html, SoupStrainer(class_=has_class("single-people__content")))
+
+    content_sections = soup.select(".single-people__content div div div div div div")
+    prof_data = {"sections": {}}
+
+    for section in content_sections:
+        h2_tag = section.find("h2")
+        if not h2_tag:
+            continue
+
+        section_name = h2_tag.text.strip()
+
+        if section_name in ["Research interests", "Education"]:
+            items = [li.text.strip() for li in section.select("ul li")]
+            prof_data["sections"][section_name] = items
+
+        elif section_name == "Biography":
+            bio_text = section.find("p").text.strip() if section.find("p") else ""
+            prof_data["sections"][section_name] = bio_text
+
+        elif section_name == "Recent publications":
+            publications = []
+            for pub in section.select("ul li"):
+                time_tag = pub.find("time", class_="text-card__date")
+                date = time_tag.text.strip() if time_tag else ""
+                a_tag = pub.find("a")
+                pub_name = a_tag.text.strip() if a_tag else "Unknown Publication"
+                pub_link = a_tag["href"] if a_tag and a_tag.has_attr("href") else ""
+                citation_div = pub.find("div", class_="text-card__citation")
+                citation_text = citation_div.text.strip().split("Citation:")[1] if citation_div else ""
+                publications.append({"date": date, "publication": pub_name, "link": pub_link, "citation": citation_text})
+
+            prof_data["sections"][section_name] = publications
+
+    return prof_data
+
 def get_professor_details(prof_url):
     print(f'Fetching professor details: {prof_url}')
     try:
-        driver.get(prof_url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "single-people__content")))
-        time.sleep(2)
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        content_sections = soup.select(".single-people__content div div div div div div")
-        prof_data = {"sections": {}}
-
-        for section in content_sections:
-            h2_tag = section.find("h2")
-            if not h2_tag:
-                continue
-
-            section_name = h2_tag.text.strip()
-
-            if section_name in ["Research interests", "Education"]:
-                items = [li.text.strip() for li in section.select("ul li")]
-                prof_data["sections"][section_name] = items
-
-            elif section_name == "Biography":
-                bio_text = section.find("p").text.strip() if section.find("p") else ""
-                prof_data["sections"][section_name] = bio_text
-
-            elif section_name == "Recent publications":
-                publications = []
-                for pub in section.select("ul li"):
-                    time_tag = pub.find("time", class_="text-card__date")
-                    date = time_tag.text.strip() if time_tag else ""
-                    a_tag = pub.find("a")
-                    pub_name = a_tag.text.strip() if a_tag else "Unknown Publication"
-                    pub_link = a_tag["href"] if a_tag and a_tag.has_attr("href") else ""
-                    citation_div = pub.find("div", class_="text-card__citation")
-                    citation_text = citation_div.text.strip().split("Citation:")[1] if citation_div else ""
-                    publications.append({"date": date, "publication": pub_name, "link": pub_link, "citation": citation_text})
-
-                prof_data["sections"][section_name] = publications
-
-        return prof_data
+        return parse_professor_details(
+            get_page_source().get(prof_url, kind="professor", wait_for_class="single-people__content")
+        )
     except Exception as e:
         print(f"Error fetching professor details: {e}")
         return {}
@@ -162,52 +214,55 @@ def save_publications_per_row(data, filename):
     df.drop_duplicates(inplace=True)
     df.to_csv(filename, index=False)
 
+def parse_research_spaces(html, page_url=research_spaces_url):
+    research_spaces_df = []
+    soup = make_soup(html, SoupStrainer(class_=has_class("wp-block-column")))
+    for research in soup.select('.wp-block-column.is-layout-flow.wp-block-column-is-layout-flow'):
+        title, description, link_element = research.find('h3'), research.find('p'), research.find('a', href=True)
+        if not (title and description and link_element):
+            print("Error extracting a research space: missing title, description or link")
+            continue
+        research_spaces_df.append([
+            title.get_text(strip=True), description.get_text(strip=True), urljoin(page_url, link_element['href'])
+        ])
+    return pd.DataFrame(research_spaces_df, columns=["Lab", "Description", "Link"])
+
 def get_research_spaces():
     print("Getting research spaces")
-    research_spaces_df = []
-    driver.get(research_spaces_url)
     try:
-        research_spaces = WebDriverWait(driver, 30).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, '.wp-block-column.is-layout-flow.wp-block-column-is-layout-flow'))
-        )
-
-        for research in research_spaces:
-            try:
-                title = research.find_element(By.TAG_NAME, 'h3').text
-                description = research.find_element(By.TAG_NAME, 'p').text
-                link_element = research.find_element(By.TAG_NAME, 'a')
-                link = link_element.get_attribute('href')
-                research_spaces_df.append([title, description, link])
-            except Exception as e:
-                print(f"Error extracting a research space: {e}")
-
+        html = get_page_source().get(research_spaces_url, kind="research_spaces", wait_for_class="wp-block-column")
     except Exception as e:
         print('Timeout while collecting research area URLs:', e)
-    
-    return pd.DataFrame(research_spaces_df, columns=["Lab", "Description", "Link"])
-
-def get_professors_by_area(area_name, area_url):
-    print(f'Navigating to: {area_url}')
-    response = requests.get(area_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    profs_list = []
+        return pd.DataFrame([], columns=["Lab", "Description", "Link"])
+    return parse_research_spaces(html)
 
+def parse_area_professors(html):
+    soup = make_soup(html, SoupStrainer('section'))
     profs = soup.select("section ul li article div h3 a")
-    for prof in profs:
-        prof_name = prof.text.strip()
-        prof_url = prof['href']
-        prof_data = get_professor_details(prof_url)
-        profs_list.append({"name": prof_name, "url": prof_url, "info": prof_data})
-
-    return profs_list
-
-def get_current_research_highlights():
-    print("Getting research highlights")
-    driver.get(base_url)
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "main")))
-    time.sleep(2)
+    return [(prof.text.strip(), prof['href']) for prof in profs]
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+def list_area_professors(area_url):
+    print(f'Navigating to: {area_url}')
+    return parse_area_professors(get_page_source().get(area_url, kind="area_professors"))
+
+def get_all_professors(research_areas):
+    # Area listings are fetched concurrently, then every distinct profile URL
+    # is fetched once even when the professor is listed under several areas
+    listings = get_fetcher().fetch_many(list(research_areas.values()), handler=list_area_professors)
+    prof_urls = [prof_url for profs in listings.values() for _, prof_url in profs or []]
+    print(f"Fetching {len(set(prof_urls))} unique professor pages ({len(prof_urls)} area listings)")
+    details = get_fetcher().fetch_many(prof_urls, handler=get_professor_details)
+
+    return {
+        area_name: [
+            {"name": name, "url": prof_url, "info": details[prof_url] or {}}
+            for name, prof_url in listings[area_url] or []
+        ]
+        for area_name, area_url in research_areas.items()
+    }
+
+def parse_research_highlights(html):
+    soup = make_soup(html, MAIN_STRAINER)
     highlight_divs = soup.select("main > div > div:nth-of-type(6) > div:nth-of-type(2) > div > div > div > div")
     data = []
 
@@ -230,29 +285,36 @@ def get_current_research_highlights():
             "description": p_text,
             "link": href
         })
+    return data
+
+def get_current_research_highlights():
+    print("Getting research highlights")
+    data = parse_research_highlights(get_page_source().get(base_url, kind="research_highlights", render=True))
 
     df = pd.DataFrame(data)
     df.to_csv(data_path("current_research_highlights.csv"), index=False)
     return data
 
+def parse_area_labs(html):
+    soup = make_soup(html, LINK_LIST_STRAINER)
+    items = soup.select('.wp-block-khoury-link-list-item a')
+    return [(tag.get_text(strip=True), tag.get('href')) for tag in items if tag.get('href')]
+
 def get_labs_links():
     print("Getting labs")
     lab_links, names, areas = [], [], []
+    pages = get_fetcher().fetch_many(
+        list(data['research_areas'].values()), handler=lambda url: get_page_source().get(url, kind="area_labs")
+    )
 
     for area, url in data['research_areas'].items():
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            items = soup.select('.wp-block-khoury-link-list-item a')
-
-            for tag in items:
-                href = tag.get('href')
-                text = tag.get_text(strip=True)
-                if href:
-                    lab_links.append(href)
-                    names.append(text)
-                    areas.append(area)
+            if pages[url] is None:
+                raise ValueError("page could not be fetched")
+            for text, href in parse_area_labs(pages[url]):
+                lab_links.append(href)
+                names.append(text)
+                areas.append(area)
         except Exception as e:
             print(f"Error fetching for area '{area}': {e}")
 
@@ -265,39 +327,50 @@ def get_labs_links():
     df.to_csv(data_path("labs.csv"), index=False)
     return df
 
-def main():
+# Page kind -> parser, used to re-parse archived pages offline
+PAGE_PARSERS = {
+    "research_areas": parse_research_areas,
+    "institutes_and_centers": parse_institutes_and_centers,
+    "professor": parse_professor_details,
+    "research_spaces": parse_research_spaces,
+    "area_professors": parse_area_professors,
+    "research_highlights": parse_research_highlights,
+    "area_labs": parse_area_labs
+}
+
+def main(refresh=False):
+    # Existing CSVs are kept unless refresh is set; a refresh re-crawls every
+    # stage, and cached pages only cost a conditional request
     try:
         research_areas_file = data_path("research_areas.csv")
-        if not os.path.exists(research_areas_file):
+        if refresh or not os.path.exists(research_areas_file):
             data['research_areas'] = get_research_areas()
         else:
             df = pd.read_csv(research_areas_file)
             data['research_areas'] = dict(zip(df['Area'], df['URL']))
 
-        if not os.path.exists(data_path("institutes_and_centers.csv")):
+        if refresh or not os.path.exists(data_path("institutes_and_centers.csv")):
             data['institutes_and_centers'] = get_institutes_and_centers()
 
-        if not os.path.exists(data_path("current_research_highlights.csv")):
+        if refresh or not os.path.exists(data_path("current_research_highlights.csv")):
             data['research_highlights'] = get_current_research_highlights()
 
         professor_info_file = data_path("professor_info.csv")
-        if not os.path.exists(professor_info_file):
-            data['research_profs'] = {}
-            for area_name, area_url in data['research_areas'].items():
-                data['research_profs'][area_name] = get_professors_by_area(area_name, area_url)
+        if refresh or not os.path.exists(professor_info_file):
+            data['research_profs'] = get_all_professors(data['research_areas'])
             save_publications_per_row(data['research_profs'], professor_info_file)
 
         research_spaces_file = data_path("research_spaces.csv")
-        if not os.path.exists(research_spaces_file):
+        if refresh or not os.path.exists(research_spaces_file):
             rs_df = get_research_spaces()
             rs_df.to_csv(research_spaces_file, index=False)
 
         labs_file = data_path("labs.csv")
-        if not os.path.exists(labs_file):
+        if refresh or not os.path.exists(labs_file):
             get_labs_links()
 
         profs_file = data_path("professors.csv")
-        if not os.path.exists(profs_file) and os.path.exists(professor_info_file):
+        if (refresh or not os.path.exists(profs_file)) and os.path.exists(professor_info_file):
             df = pd.read_csv(professor_info_file)
             df = df[df.columns[1:-4]].drop_duplicates()
             df.to_csv(profs_file, index=False)
@@ -306,11 +379,18 @@ def main():
         print('Error:', e)
 
     finally:
-        driver.close()
-        driver.quit()
+        if "page_source" in _services:
+            _services["page_source"].close()
+        if "crawl_cache" in _services:
+            _services["crawl_cache"].save()
+            _services["crawl_cache"].write_manifest(data_path("changed_urls.json"))
 
     with open(data_path("data_dump.json"), 'w') as outfile:
         json.dump(data, outfile, indent=4)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrape Khoury research data into modules/data.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-crawl stages whose CSV already exists, revalidating cached pages")
+    args = parser.parse_args()
+    main(refresh=args.refresh)
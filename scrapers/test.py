@@ -12,6 +12,7 @@ import requests
 import pandas as pd
 from scrapers.helpers.lab_summarizer import summarize_labs
 from scrapers.helpers.paper_summarizer import process_publications
+from scrapers.helpers.page_source import LazyChrome
 import urllib3
 import torch
 from itertools import islice
@@ -31,8 +32,6 @@ options.add_argument('--headless')  # Run in headless mode
 options.add_argument('--no-sandbox')
 options.add_argument('--disable-dev-shm-usage')
 
-driver = uc.Chrome(options=options)
-
 # Load metadata from JSON file
 with open("./metadata.json", 'r') as f:
     metadata = json.load(f)
@@ -50,7 +49,8 @@ options.headless = True  # Run in headless mode
 options.add_argument("--disable-blink-features=AutomationControlled")
 options.add_argument("--no-sandbox")
 options.add_argument("--disable-dev-shm-usage")
-driver = uc.Chrome(options=options)
+# Chrome only starts the first time a function uses the driver
+driver = LazyChrome(lambda: uc.Chrome(options=options))
 
 # Store the results
 data = {}
@@ -0,0 +1,63 @@
+import types
+import pytest
+
+from modules.module2 import cross_rerank
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+class SlowCrossEncoder:
+    # Scores a pair by the number in its document and advances the fake clock
+    # by pair_ms per pair
+    def __init__(self, clock, pair_ms):
+        self.clock = clock
+        self.pair_ms = pair_ms
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32):
+        self.calls.append(len(pairs))
+        self.clock.now += self.pair_ms * len(pairs) / 1000
+        return [float(doc.split()[-1]) for _, doc in pairs]
+
+def make_results(n):
+    return {
+        "documents": [[f"doc {i}" for i in range(n)]],
+        "metadatas": [[{"doc_id": i} for i in range(n)]],
+        "distances": [[i / n for i in range(n)]]
+    }
+
+@pytest.fixture
+def slow_model(monkeypatch):
+    clock = FakeClock()
+    model = SlowCrossEncoder(clock, pair_ms=10)
+    monkeypatch.setattr(cross_rerank, "time", types.SimpleNamespace(perf_counter=clock.perf_counter))
+    monkeypatch.setattr(cross_rerank, "get_model", lambda name: model)
+    return model
+
+def test_budget_cuts_off_a_single_batch(slow_model):
+    # 20 candidates fit in one batch of 32, but scoring all of them takes 200ms.
+    # The first sub-batch takes 80ms, and a second one is expected to overrun
+    reranked = cross_rerank.rerank("q", make_results(20), top_n=20, batch_size=32, budget_ms=100)
+
+    info = reranked["rerank"]
+    assert info["truncated"]
+    assert slow_model.calls == [cross_rerank.BUDGET_SUB_BATCH]
+    assert info["scored"] == cross_rerank.BUDGET_SUB_BATCH
+    assert info["ms"] == 80.0
+
+    # Scored candidates come first, best score first; the rest keep retrieval order
+    scored = info["scored"]
+    assert reranked["metadatas"][0][:scored] == [{"doc_id": i} for i in reversed(range(scored))]
+    assert reranked["metadatas"][0][scored:] == [{"doc_id": i} for i in range(scored, 20)]
+    assert reranked["rerank_scores"][0][scored:] == [None] * (20 - scored)
+
+def test_without_budget_scores_everything_in_one_batch(slow_model):
+    reranked = cross_rerank.rerank("q", make_results(20), top_n=20, batch_size=32)
+
+    assert slow_model.calls == [20]
+    assert not reranked["rerank"]["truncated"]
+    assert [m["doc_id"] for m in reranked["metadatas"][0]] == list(reversed(range(20)))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from modules.module2 import embedding_cache, model_registry
+
+class RecordingEncoder:
+    def __init__(self, value):
+        self.value = value
+        self.texts = []
+
+    def encode(self, text, **kwargs):
+        self.texts.append(text)
+        return np.full(3, self.value + len(self.texts), dtype=np.float32)
+
+@pytest.fixture
+def encoders(monkeypatch):
+    fp32, int8 = RecordingEncoder(0.0), RecordingEncoder(100.0)
+    monkeypatch.setitem(model_registry._loaders, "roberta_fp32", lambda: fp32)
+    monkeypatch.setitem(model_registry._loaders, "roberta_int8", lambda: int8)
+    for name in ("roberta", "roberta_fp32", "roberta_int8"):
+        monkeypatch.delitem(model_registry._instances, name, raising=False)
+        monkeypatch.delitem(model_registry._variants, name, raising=False)
+    monkeypatch.setattr(embedding_cache, "query_embedding_cache", embedding_cache.QueryEmbeddingCache())
+    return fp32, int8
+
+def test_key_is_the_encoded_text(encoders):
+    fp32, _ = encoders
+    upper = embedding_cache.encode_query("roberta", "Machine  Learning ")
+    lower = embedding_cache.encode_query("roberta", "machine learning")
+    again = embedding_cache.encode_query("roberta", "Machine Learning")
+
+    assert fp32.texts == ["Machine Learning", "machine learning"]
+    assert not np.array_equal(upper, lower)
+    assert again is upper
+
+def test_key_includes_the_model_variant(encoders):
+    fp32, int8 = encoders
+    before = embedding_cache.encode_query("roberta", "robotics")
+    model_registry.use_model("roberta", "roberta_int8")
+    after = embedding_cache.encode_query("roberta", "robotics")
+
+    assert fp32.texts == ["robotics"] and int8.texts == ["robotics"]
+    assert not np.array_equal(before, after)
@@ -0,0 +1,32 @@
+import sys
+import types
+import pytest
+
+from modules.module2 import intent_onnx, model_registry
+
+@pytest.fixture
+def cpu_without_export(monkeypatch, tmp_path):
+    calls = []
+    transformers = types.ModuleType("transformers")
+    transformers.pipeline = lambda task, **kwargs: calls.append(task) or "torch pipeline"
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    monkeypatch.setattr(model_registry, "get_device", lambda: "cpu")
+    monkeypatch.setattr(model_registry, "_onnxruntime_available", lambda: True)
+    monkeypatch.setattr(intent_onnx, "INTENT_ONNX_PATH", str(tmp_path / "model.onnx"))
+    monkeypatch.setattr(intent_onnx, "export_intent_model", lambda *args, **kwargs: pytest.fail("exported at load"))
+    return calls
+
+def test_auto_falls_back_to_torch_without_an_export(cpu_without_export, monkeypatch, capsys):
+    monkeypatch.setattr(model_registry, "INTENT_BACKEND", "auto")
+
+    assert model_registry._load_intent() == "torch pipeline"
+    assert cpu_without_export == ["text-classification"]
+    assert "No ONNX intent model" in capsys.readouterr().out
+
+def test_onnx_backend_never_exports(cpu_without_export, monkeypatch, tmp_path):
+    monkeypatch.setattr(model_registry, "INTENT_BACKEND", "onnx")
+    load = intent_onnx.load_onnx_intent_classifier
+    monkeypatch.setattr(intent_onnx, "load_onnx_intent_classifier", lambda: load(str(tmp_path)))
+
+    with pytest.raises(FileNotFoundError, match="python -m modules.module2.intent_onnx"):
+        model_registry._load_intent()
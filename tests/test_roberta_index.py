@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.module2 import roberta_index
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+
+    def count(self):
+        return len(self.rows)
+
+    def get(self, ids=None, include=(), **kwargs):
+        ids = list(self.rows) if ids is None else [i for i in ids if i in self.rows]
+        result = {"ids": ids}
+        for field in include:
+            result[field] = [self.rows[i][field] for i in ids]
+        return result
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        for doc_id, doc, emb, meta in zip(ids, documents, embeddings, metadatas):
+            self.rows[doc_id] = {"documents": doc, "embeddings": np.asarray(emb), "metadatas": dict(meta)}
+
+    def update(self, ids, metadatas):
+        for doc_id, meta in zip(ids, metadatas):
+            self.rows[doc_id]["metadatas"] = dict(meta)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def delete_collection(self, name):
+        self.collections.pop(name, None)
+
+class FakeEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+class FakeDoc:
+    noun_chunks = ()
+
+class FakeNLP:
+    pipe_names = []
+
+    def __init__(self):
+        self.pipe_calls = 0
+
+    def pipe(self, rows, as_tuples=False, **kwargs):
+        self.pipe_calls += 1
+        return ((FakeDoc(), context) for _, context in rows)
+
+def write_sources(paths, labs, research):
+    # doc_ids numbered across sources, the way pipeline.py assigns them
+    pd.DataFrame({"Summary": labs, "doc_id": range(len(labs))}).to_csv(paths["Labs"], index=False)
+    pd.DataFrame({"Title": research, "doc_id": range(len(labs), len(labs) + len(research))}).to_csv(
+        paths["Research"], index=False)
+
+@pytest.fixture
+def index_env(monkeypatch, tmp_path):
+    paths = {"Labs": str(tmp_path / "labs.csv"), "Research": str(tmp_path / "research.csv")}
+    client, encoder, nlp = FakeClient(), FakeEncoder(), FakeNLP()
+    monkeypatch.setattr(roberta_index, "datasources", paths)
+    monkeypatch.setattr(roberta_index, "get_chroma_client", lambda: client)
+    monkeypatch.setattr(roberta_index, "get_device", lambda: "cpu")
+    monkeypatch.setattr(roberta_index, "get_model", lambda name: encoder if name == "roberta_fp32" else nlp)
+    monkeypatch.setattr(roberta_index, "load_term_vocab", lambda: {})
+    monkeypatch.setattr(roberta_index, "save_term_stats", lambda *args, **kwargs: None)
+    monkeypatch.setattr(roberta_index, "read_build_stamp", lambda: {})
+    monkeypatch.setattr(roberta_index, "write_build_stamp", lambda count: {})
+    return paths, client, encoder, nlp
+
+def test_renumbered_rows_are_not_re_embedded(index_env):
+    paths, client, encoder, nlp = index_env
+    write_sources(paths, ["lab a", "lab b"], ["paper x", "paper y", "paper z"])
+    roberta_index.build_indexes(full_rebuild=True)
+    assert len(encoder.encoded) == 5
+
+    # One new Labs row shifts every Research doc_id
+    encoder.encoded.clear()
+    write_sources(paths, ["lab new", "lab a", "lab b"], ["paper x", "paper y", "paper z"])
+    roberta_index.build_indexes()
+
+    assert encoder.encoded == ["lab new"]
+    docs = client.collections["research_index"]
+    assert docs.count() == 6
+    texts, _, metadatas = roberta_index.load_documents()
+    expected = {text: meta["doc_id"] for text, meta in zip(texts, metadatas)}
+    assert {row["documents"]: row["metadatas"]["doc_id"] for row in docs.rows.values()} == expected
+
+def test_rows_stored_under_old_ids_reuse_their_embeddings(index_env):
+    paths, client, encoder, nlp = index_env
+    write_sources(paths, ["lab a"], ["paper x"])
+    docs = client.get_or_create_collection("research_index")
+    for doc_id, (text, source) in enumerate([("lab a", "Labs"), ("paper x", "Research")]):
+        meta = {"source": source, "doc_id": doc_id, "content_hash": roberta_index.content_hash(text), "term_ids": ""}
+        docs.upsert([str(doc_id)], [text], [[9.0, 9.0]], [meta])
+
+    roberta_index.build_indexes()
+
+    assert encoder.encoded == []
+    assert sorted(docs.rows) == sorted(
+        f"{source}:{roberta_index.content_hash(text)}" for text, source in [("lab a", "Labs"), ("paper x", "Research")]
+    )
+    assert all(list(row["embeddings"]) == [9.0, 9.0] for row in docs.rows.values())
+
+def test_one_spacy_pipe_across_chunks(index_env):
+    paths, client, encoder, nlp = index_env
+    write_sources(paths, [f"lab {i}" for i in range(5)], [f"paper {i}" for i in range(4)])
+    roberta_index.build_indexes(full_rebuild=True, chunk_size=2, n_process=2)
+
+    assert nlp.pipe_calls == 1
+    assert len(encoder.encoded) == 9
+    assert client.collections["research_index"].count() == 9
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from modules.module2 import vector_store
+from modules.module2.vector_store import FaissVectorStore, StaleIndexError, build_faiss_index, write_build_stamp
+
+class FakeCollection:
+    def __init__(self, ids, documents, metadatas, embeddings):
+        self.ids, self.documents, self.metadatas, self.embeddings = ids, documents, metadatas, embeddings
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, include, limit, offset):
+        page = {"ids": self.ids[offset:offset + limit]}
+        for field in include:
+            page[field] = getattr(self, field)[offset:offset + limit]
+        return page
+
+@pytest.fixture
+def collection(monkeypatch, tmp_path):
+    embeddings = np.eye(4, dtype=np.float32) * 3
+    fake = FakeCollection(
+        ids=[str(i) for i in range(4)],
+        documents=[f"doc {i}" for i in range(4)],
+        metadatas=[{"doc_id": i, "source": "Labs", "content_hash": f"h{i}"} for i in range(4)],
+        embeddings=list(embeddings)
+    )
+    monkeypatch.setattr(vector_store, "get_collection", lambda name: fake)
+    monkeypatch.setattr(vector_store, "BUILD_STAMP_PATH", str(tmp_path / "research_index_build.json"))
+    write_build_stamp(fake.count())
+    return fake
+
+def test_query_with_read_only_embedding(collection, tmp_path):
+    build_faiss_index("flat", index_dir=str(tmp_path))
+    store = FaissVectorStore(index_dir=str(tmp_path), on_stale="error")
+
+    embedding = np.array([0.0, 2.0, 0.0, 0.0], dtype=np.float32)
+    embedding.setflags(write=False)
+    results = store.query(embedding, top_k=2)
+
+    assert results["ids"][0][0] == "1"
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+    np.testing.assert_array_equal(embedding, [0.0, 2.0, 0.0, 0.0])
+
+def test_stale_index_is_detected_by_build_stamp(collection, tmp_path, capsys):
+    build_faiss_index("flat", index_dir=str(tmp_path))
+    # The default check never reads the collection
+    collection.get = collection.count = None
+    assert FaissVectorStore(index_dir=str(tmp_path), on_stale="error").check_fresh("error")
+
+    write_build_stamp(4)
+    with pytest.raises(StaleIndexError, match="build of"):
+        FaissVectorStore(index_dir=str(tmp_path), on_stale="error")
+
+    FaissVectorStore(index_dir=str(tmp_path), on_stale="warn")
+    assert "latest is from" in capsys.readouterr().out
+
+def test_full_check_compares_the_collection(collection, tmp_path):
+    build_faiss_index("flat", index_dir=str(tmp_path))
+    assert FaissVectorStore(index_dir=str(tmp_path), on_stale="error", full_check=True)
+
+    collection.metadatas[2] = dict(collection.metadatas[2], content_hash="changed")
+    FaissVectorStore(index_dir=str(tmp_path), on_stale="error")
+    with pytest.raises(StaleIndexError, match="no longer matches"):
+        FaissVectorStore(index_dir=str(tmp_path), on_stale="error", full_check=True)
+
+    collection.ids.append("4")
+    with pytest.raises(StaleIndexError, match="now has 5"):
+        FaissVectorStore(index_dir=str(tmp_path), on_stale="error", full_check=True)
+
+def test_metadata_lookup_by_hash(collection, tmp_path):
+    build_faiss_index("flat", index_dir=str(tmp_path))
+    store = FaissVectorStore(index_dir=str(tmp_path), on_stale="error")
+
+    assert store.metadatas_by_hash(["h3", "missing", "h1"]) == {
+        "h3": collection.metadatas[3], "h1": collection.metadatas[1]
+    }